@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+
+from app.models.user import User
+from app.db.pool import pool_report
+from app.services.auth import get_current_admin_user
+from app.services.catalog_index import catalog_index
+from app.services.response_cache import response_cache
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/catalog-index")
+def get_catalog_index_report(current_user: User = Depends(get_current_admin_user)):
+    """Memory budget report for the in-memory catalog index"""
+    return catalog_index.memory_report()
+
+
+@router.get("/metrics/cache")
+def get_response_cache_metrics(current_user: User = Depends(get_current_admin_user)):
+    """Hit, miss and eviction counters for the response cache"""
+    return response_cache.report()
+
+
+@router.get("/metrics/db-pool")
+def get_db_pool_metrics(current_user: User = Depends(get_current_admin_user)):
+    """Connection pool state, checkout wait times and overflow/timeout counts"""
+    return pool_report()
@@ -1,56 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
+from app.db import repository
 from app.models.user import User
 from app.models.library import Library, StatusEnum
-from app.models.manga import Manga
-from app.schemas.library import LibraryEntryCreate, LibraryEntryUpdate, LibraryEntry, LibraryList
+from app.schemas.library import (
+    LibraryEntryCreate, LibraryEntryUpdate, LibraryEntry, LibraryList, LibraryCompactList,
+    LibraryBatchRequest, LibraryBatchResponse, LibraryStats, LibraryImportResponse
+)
 from app.services.auth import get_current_active_user
+from app.services import library_service, manga_service, popularity
+from app.services.pagination import InvalidCursorError
+from app.services.tasks import rescore_manga, rescore_manga_batch
 
 router = APIRouter(prefix="/api/library", tags=["library"])
 
+library_list_adapters = {"full": TypeAdapter(LibraryList), "compact": TypeAdapter(LibraryCompactList)}
 
-@router.get("/", response_model=LibraryList)
+
+def _library_response(db: Session, user_id: int, status_filter, limit, cursor, view: str, format: str):
+    """One page, the whole library, or an NDJSON stream of it"""
+    if format == "ndjson":
+        return StreamingResponse(
+            library_service.iter_library_ndjson(db, user_id, status_filter, view), media_type="application/x-ndjson"
+        )
+    try:
+        entries, next_cursor = library_service.get_library_page(db, user_id, status_filter, view, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    adapter = library_list_adapters[view]
+    data = adapter.validate_python({"entries": entries, "next_cursor": next_cursor}, from_attributes=True)
+    return Response(content=adapter.dump_json(data), media_type="application/json")
+
+
+@router.get("/", response_model=Union[LibraryList, LibraryCompactList])
 def get_current_user_library(
     status: Optional[StatusEnum] = None,
+    limit: Optional[int] = Query(None, ge=1, le=library_service.LIBRARY_PAGE_MAX),
+    cursor: Optional[str] = None,
+    view: str = Query("full", enum=list(library_service.LIBRARY_VIEWS)),
+    format: str = Query("json", enum=["json", "ndjson"]),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    return _library_response(db, current_user.id, status, limit, cursor, view, format)
+
+
+@router.get("/export")
+def export_library(
+    format: str = Query("csv", enum=list(library_service.LIBRARY_EXPORT_FORMATS)),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    """Download the current user's library as CSV or NDJSON, streamed as it is read"""
+    return StreamingResponse(
+        library_service.iter_library_export(db, current_user.id, format),
+        media_type=library_service.LIBRARY_EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="library.{format}"'},
+    )
+
+
+@router.post("/import", response_model=LibraryImportResponse)
+def import_library(
+    file: UploadFile = File(...),
+    format: str = Query("csv", enum=list(library_service.LIBRARY_EXPORT_FORMATS)),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Library).filter(Library.user_id == current_user.id)
-    
-    if status:
-        query = query.filter(Library.status == status)
-    
-    # Join with manga to get manga details
-    query = query.join(Manga)
-    
-    library_entries = query.order_by(Manga.title).all()
-    return {"entries": library_entries}
+    """Add or update entries from an export file; rows are matched by manga_id, else by title"""
+    try:
+        summary, changed_manga_ids = library_service.import_library(db, current_user.id, file.file, format)
+    except library_service.InvalidImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if changed_manga_ids:
+        manga_service.notify_mangas_changed(db, changed_manga_ids)
+        rescore_manga_batch.delay(changed_manga_ids)
+    return summary
 
 
-@router.get("/{user_id}", response_model=LibraryList)
+@router.get("/{user_id}", response_model=Union[LibraryList, LibraryCompactList])
 def get_user_library(
     user_id: int,
     status: Optional[StatusEnum] = None,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=library_service.LIBRARY_PAGE_MAX),
+    cursor: Optional[str] = None,
+    view: str = Query("full", enum=list(library_service.LIBRARY_VIEWS)),
+    format: str = Query("json", enum=["json", "ndjson"]),
+    db: Session = Depends(get_read_db)
 ):
     # Check if user exists
-    user = db.query(User).filter(User.id == user_id).first()
+    user = repository.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    query = db.query(Library).filter(Library.user_id == user_id)
-    
-    if status:
-        query = query.filter(Library.status == status)
-    
-    # Join with manga to get manga details
-    query = query.join(Manga)
-    
-    library_entries = query.order_by(Manga.title).all()
-    return {"entries": library_entries}
+    return _library_response(db, user_id, status, limit, cursor, view, format)
+
+
+@router.get("/{user_id}/stats", response_model=LibraryStats)
+def get_user_library_stats(user_id: int, db: Session = Depends(get_read_db)):
+    """Entry counts per status and chapters read, from the user's stats row"""
+    stats = library_service.get_library_stats(db, user_id)
+    if stats is None:
+        # No row until the first library write
+        if not repository.get_user(db, user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        stats = {"user_id": user_id}
+    return stats
+
+
+@router.post("/batch", response_model=LibraryBatchResponse)
+def apply_library_batch(
+    batch: LibraryBatchRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Add, update and remove many library entries in one request and one transaction"""
+    results, changed_manga_ids = library_service.apply_library_batch(db, current_user.id, batch.operations)
+    if changed_manga_ids:
+        manga_service.notify_mangas_changed(db, changed_manga_ids)
+        rescore_manga_batch.delay(changed_manga_ids)
+    failed = sum(1 for result in results if result["result"] == "error")
+    return {"results": results, "applied": len(results) - failed, "failed": failed}
 
 
 @router.post("/", response_model=LibraryEntry, status_code=status.HTTP_201_CREATED)
@@ -60,15 +134,12 @@ def add_to_library(
     db: Session = Depends(get_db)
 ):
     # Check if manga exists
-    manga = db.query(Manga).filter(Manga.id == library_entry.manga_id).first()
+    manga = repository.get_manga(db, library_entry.manga_id)
     if not manga:
         raise HTTPException(status_code=404, detail="Manga not found")
     
     # Check if entry already exists
-    existing_entry = db.query(Library).filter(
-        Library.user_id == current_user.id,
-        Library.manga_id == library_entry.manga_id
-    ).first()
+    existing_entry = repository.get_library_entry(db, current_user.id, library_entry.manga_id)
     
     if existing_entry:
         raise HTTPException(
@@ -85,8 +156,14 @@ def add_to_library(
     )
     
     db.add(db_library_entry)
+    popularity.adjust_library_count(db, library_entry.manga_id, 1)
+    library_service.adjust_library_stats(
+        db, current_user.id, library_service.library_stats_delta(after=(library_entry.status, library_entry.progress))
+    )
     db.commit()
     db.refresh(db_library_entry)
+    manga_service.notify_manga_changed(db, library_entry.manga_id)
+    rescore_manga.delay(library_entry.manga_id)
     
     return db_library_entry
 
@@ -99,18 +176,19 @@ def update_library_entry(
     db: Session = Depends(get_db)
 ):
     # Check if entry exists
-    db_library_entry = db.query(Library).filter(
-        Library.user_id == current_user.id,
-        Library.manga_id == manga_id
-    ).first()
+    db_library_entry = repository.get_library_entry(db, current_user.id, manga_id)
     
     if not db_library_entry:
         raise HTTPException(status_code=404, detail="Library entry not found")
     
     # Update library entry
+    before = (db_library_entry.status, db_library_entry.progress)
     update_data = library_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_library_entry, key, value)
+    library_service.adjust_library_stats(db, current_user.id, library_service.library_stats_delta(
+        before, (db_library_entry.status, db_library_entry.progress)
+    ))
     
     db.commit()
     db.refresh(db_library_entry)
@@ -125,16 +203,19 @@ def remove_from_library(
     db: Session = Depends(get_db)
 ):
     # Check if entry exists
-    db_library_entry = db.query(Library).filter(
-        Library.user_id == current_user.id,
-        Library.manga_id == manga_id
-    ).first()
+    db_library_entry = repository.get_library_entry(db, current_user.id, manga_id)
     
     if not db_library_entry:
         raise HTTPException(status_code=404, detail="Library entry not found")
     
     # Delete entry
     db.delete(db_library_entry)
+    popularity.adjust_library_count(db, manga_id, -1)
+    library_service.adjust_library_stats(
+        db, current_user.id, library_service.library_stats_delta(before=(db_library_entry.status, db_library_entry.progress))
+    )
     db.commit()
+    manga_service.notify_manga_changed(db, manga_id)
+    rescore_manga.delay(manga_id)
     
     return None 
\ No newline at end of file
@@ -1,52 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
+from pydantic import TypeAdapter
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
 from app.models.user import User
 from app.services import manga_service
-from app.schemas.manga import Manga, MangaCreate, MangaUpdate, MangaSearchResults
+from app.services.pagination import InvalidCursorError
+from app.services.tag_vocabulary import get_tag_vocabulary
+from app.services.title_suggest import suggest_titles, SUGGEST_MAX_LIMIT
+from app.services.response_cache import response_cache, CATALOG_NAMESPACE
+from app.schemas.manga import Manga, MangaCreate, MangaUpdate, MangaSearchResults, TagCount, MangaSuggestion
 from app.services.auth import get_current_active_user, get_current_admin_user
 
 router = APIRouter(prefix="/api/manga", tags=["manga"])
 
+# Serializers for the cached read endpoints
+search_results_adapter = TypeAdapter(MangaSearchResults)
+manga_adapter = TypeAdapter(Manga)
+tags_adapter = TypeAdapter(Union[List[TagCount], List[str]])
+
 
 @router.get("/", response_model=MangaSearchResults)
 def search_manga(
+    request: Request,
     skip: int = 0,
     limit: int = 20,
     search: Optional[str] = "",
     min_rating: float = 0,
     tags: Optional[List[str]] = Query(None),
+    tag_mode: str = Query('all', enum=['all', 'any']),
     year: Optional[int] = None,
-    sort_by: str = 'popular',
-    db: Session = Depends(get_db)
+    sort_by: str = Query('popular', enum=['popular', 'rating', 'newest', 'title', 'relevance']),
+    match: str = Query('fulltext', enum=['fulltext', 'substring']),
+    cursor: Optional[str] = None,
+    include_facets: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    def build():
+        try:
+            manga_list, total, total_is_exact, next_cursor = manga_service.search_manga(
+                db,
+                search_term=search,
+                tags=tags,
+                tag_mode=tag_mode,
+                year=year,
+                skip=skip,
+                limit=limit,
+                min_rating=min_rating,
+                sort_by=sort_by,
+                match=match,
+                cursor=cursor
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        results = {
+            "results": manga_list,
+            "total": total,
+            "total_is_exact": total_is_exact,
+            "next_cursor": next_cursor
+        }
+        if include_facets:
+            results["facets"] = manga_service.search_facets(
+                db,
+                search_term=search,
+                tags=tags,
+                tag_mode=tag_mode,
+                year=year,
+                min_rating=min_rating,
+                match=match
+            )
+        return results
+
+    return response_cache.respond(request, CATALOG_NAMESPACE, search_results_adapter, build)
+
+
+@router.get("/tags", response_model=Union[List[TagCount], List[str]])
+def get_all_tags(
+    request: Request,
+    with_counts: bool = False,
+    db: Session = Depends(get_read_db)
 ):
-    manga_list, total = manga_service.search_manga(
-        db, 
-        search_term=search, 
-        tags=tags, 
-        year=year, 
-        skip=skip, 
-        limit=limit, 
-        min_rating=min_rating,
-        sort_by=sort_by
+    """Get all unique manga tags, optionally with the number of manga per tag"""
+    def build():
+        vocabulary = get_tag_vocabulary(db)
+        return vocabulary.counts if with_counts else vocabulary.names
+
+    # Clients may reuse their copy but must revalidate it with If-None-Match
+    return response_cache.respond(
+        request, CATALOG_NAMESPACE, tags_adapter, build, headers={"Cache-Control": "no-cache"}
     )
-    return {"results": manga_list, "total": total}
 
 
-@router.get("/tags", response_model=List[str])
-def get_all_tags(db: Session = Depends(get_db)):
-    """Get all unique manga tags"""
-    return manga_service.get_all_tags(db)
+@router.get("/suggest", response_model=List[MangaSuggestion])
+def suggest_manga(
+    q: str,
+    limit: int = Query(10, ge=1, le=SUGGEST_MAX_LIMIT),
+    db: Session = Depends(get_read_db)
+):
+    """Title autocomplete: manga whose title, or a word in it, starts with ``q``"""
+    return suggest_titles(db, q, limit)
 
 
 @router.get("/{manga_id}", response_model=Manga)
-def get_manga(manga_id: int, db: Session = Depends(get_db)):
-    db_manga = manga_service.get_manga(db, manga_id)
-    if db_manga is None:
-        raise HTTPException(status_code=404, detail="Manga not found")
-    return db_manga
+def get_manga(manga_id: int, request: Request, db: Session = Depends(get_read_db)):
+    def build():
+        db_manga = manga_service.get_manga(db, manga_id)
+        if db_manga is None:
+            raise HTTPException(status_code=404, detail="Manga not found")
+        return db_manga
+
+    return response_cache.respond(request, CATALOG_NAMESPACE, manga_adapter, build)
 
 
 @router.post("/", response_model=Manga, status_code=status.HTTP_201_CREATED)
@@ -1,48 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
-from sqlalchemy import desc, func
+from sqlalchemy.exc import IntegrityError
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
+from app.db import repository
 from app.models.user import User
 from app.models.review import Review, Like
-from app.models.manga import Manga
 from app.schemas.review import ReviewCreate, ReviewUpdate, Review as ReviewSchema, ReviewList
 from app.services.auth import get_current_active_user, get_current_admin_user
 from app.services import manga_service
+from app.services.like_counter import like_counter, toggle_like
+from app.services.tasks import rescore_manga
+from app.services.pagination import InvalidCursorError, paginate
+from app.services.response_cache import response_cache, reviews_namespace
 
 router = APIRouter(tags=["reviews"])
 
+review_list_adapter = TypeAdapter(ReviewList)
+
+# Unique index that allows one review per user and manga
+REVIEW_UNIQUE_INDEX = "uq_reviews_user_id_manga_id"
+
+
+def _is_duplicate_review(error: IntegrityError) -> bool:
+    """Whether an insert failed on the one-review-per-manga index rather than another constraint"""
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint is not None:
+        return constraint == REVIEW_UNIQUE_INDEX
+    # SQLite names the columns instead of the index
+    return "UNIQUE constraint failed: reviews.user_id, reviews.manga_id" in str(error.orig)
+
 
 @router.get("/api/manga/{manga_id}/reviews", response_model=ReviewList)
 def get_manga_reviews(
     manga_id: int,
+    request: Request,
     sort_by: Optional[str] = Query("likes", enum=["likes", "newest"]),
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    # Check if manga exists
-    manga = db.query(Manga).filter(Manga.id == manga_id).first()
-    if not manga:
-        raise HTTPException(status_code=404, detail="Manga not found")
-    
-    # Query reviews for this manga
-    query = db.query(Review).filter(Review.manga_id == manga_id)
-    
-    # Sort reviews
-    if sort_by == "likes":
-        query = query.order_by(desc(Review.likes), desc(Review.timestamp))
-    elif sort_by == "newest":
-        query = query.order_by(desc(Review.timestamp))
-    
-    # Count total matching records
-    total = query.count()
-    
-    # Get paginated results
-    reviews = query.offset(skip).limit(limit).all()
-    
-    return {"reviews": reviews, "total": total}
+    def build():
+        # Check if manga exists
+        manga = repository.get_manga(db, manga_id)
+        if not manga:
+            raise HTTPException(status_code=404, detail="Manga not found")
+    
+        # Query reviews for this manga, loading their authors in one extra query
+        query = db.query(Review).options(selectinload(Review.user)).filter(Review.manga_id == manga_id)
+    
+        # Sort reviews, ending in the id so keyset cursors are stable
+        if sort_by == "newest":
+            sort_columns = [(Review.timestamp, True), (Review.id, True)]
+        else:
+            sort_columns = [(Review.likes, True), (Review.timestamp, True), (Review.id, True)]
+    
+        # Count total matching records
+        total = query.count()
+    
+        # Get paginated results
+        try:
+            reviews, next_cursor = paginate(query, sort_by, sort_columns, skip=skip, limit=limit, cursor=cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+        return {"reviews": reviews, "total": total, "next_cursor": next_cursor}
+
+    return response_cache.respond(request, reviews_namespace(manga_id), review_list_adapter, build)
 
 
 @router.post("/api/manga/{manga_id}/reviews", response_model=ReviewSchema, status_code=status.HTTP_201_CREATED)
@@ -53,23 +80,11 @@ def create_review(
     db: Session = Depends(get_db)
 ):
     # Check if manga exists
-    manga = db.query(Manga).filter(Manga.id == manga_id).first()
+    manga = repository.get_manga(db, manga_id)
     if not manga:
         raise HTTPException(status_code=404, detail="Manga not found")
     
-    # Check if user already reviewed this manga
-    existing_review = db.query(Review).filter(
-        Review.user_id == current_user.id,
-        Review.manga_id == manga_id
-    ).first()
-    
-    if existing_review:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already reviewed this manga"
-        )
-    
-    # Create new review
+    # Create new review; the unique (user_id, manga_id) index rejects a second one
     db_review = Review(
         user_id=current_user.id,
         manga_id=manga_id,
@@ -79,11 +94,22 @@ def create_review(
     )
     
     db.add(db_review)
-    db.commit()
+    try:
+        manga_service.adjust_manga_rating(db, manga_id, review.rating, 1)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if not _is_duplicate_review(e):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have already reviewed this manga"
+        )
     db.refresh(db_review)
     
-    # Update manga's average rating
-    manga_service.update_manga_rating(db, manga_id)
+    manga_service.notify_manga_changed(db, manga_id)
+    response_cache.invalidate(reviews_namespace(manga_id))
+    rescore_manga.delay(manga_id)
     
     return db_review
 
@@ -96,7 +122,7 @@ def update_review(
     db: Session = Depends(get_db)
 ):
     # Check if review exists and belongs to current user
-    db_review = db.query(Review).filter(Review.id == review_id).first()
+    db_review = repository.get_review(db, review_id)
     
     if not db_review:
         raise HTTPException(status_code=404, detail="Review not found")
@@ -107,17 +133,23 @@ def update_review(
             detail="Not authorized to update this review"
         )
     
-    # Update review
+    # Update review, moving the manga's rating totals by the change in rating
     update_data = review_update.dict(exclude_unset=True)
+    old_rating = db_review.rating
     for key, value in update_data.items():
         setattr(db_review, key, value)
+    rating_changed = "rating" in update_data and db_review.rating != old_rating
+    if rating_changed:
+        manga_service.adjust_manga_rating(db, db_review.manga_id, db_review.rating - old_rating, 0)
     
     db.commit()
     db.refresh(db_review)
     
-    # Update manga's average rating if rating changed
-    if "rating" in update_data:
-        manga_service.update_manga_rating(db, db_review.manga_id)
+    if rating_changed:
+        manga_service.notify_manga_changed(db, db_review.manga_id)
+    response_cache.invalidate(reviews_namespace(db_review.manga_id))
+    if rating_changed:
+        rescore_manga.delay(db_review.manga_id)
     
     return db_review
 
@@ -129,7 +161,7 @@ def delete_review(
     db: Session = Depends(get_db)
 ):
     # Check if review exists and belongs to current user
-    db_review = db.query(Review).filter(Review.id == review_id).first()
+    db_review = repository.get_review(db, review_id)
     
     if not db_review:
         raise HTTPException(status_code=404, detail="Review not found")
@@ -145,12 +177,14 @@ def delete_review(
     # Delete all likes for this review
     db.query(Like).filter(Like.review_id == review_id).delete()
     
-    # Delete review
+    # Delete review and take its rating out of the manga's totals
+    manga_service.adjust_manga_rating(db, manga_id, -db_review.rating, -1)
     db.delete(db_review)
     db.commit()
     
-    # Update manga's average rating
-    manga_service.update_manga_rating(db, manga_id)
+    manga_service.notify_manga_changed(db, manga_id)
+    response_cache.invalidate(reviews_namespace(manga_id))
+    rescore_manga.delay(manga_id)
     
     return None
 
@@ -162,28 +196,22 @@ def like_review(
     db: Session = Depends(get_db)
 ):
     # Check if review exists
-    db_review = db.query(Review).filter(Review.id == review_id).first()
+    db_review = repository.get_review(db, review_id)
     
     if not db_review:
         raise HTTPException(status_code=404, detail="Review not found")
     
-    # Check if user already liked this review
-    existing_like = db.query(Like).filter(
-        Like.user_id == current_user.id,
-        Like.review_id == review_id
-    ).first()
-    
-    if existing_like:
-        # Remove like
-        db.delete(existing_like)
-        db_review.likes -= 1
-    else:
-        # Add like
-        db_like = Like(user_id=current_user.id, review_id=review_id)
-        db.add(db_like)
-        db_review.likes += 1
-    
+    # Insert or delete the like row; the counter moves by however many rows changed
+    delta = toggle_like(db, current_user.id, review_id)
+    like_counter.record(db, review_id, delta)
     db.commit()
     db.refresh(db_review)
-    
-    return db_review 
\ No newline at end of file
+    if not like_counter.write_behind:
+        response_cache.invalidate(reviews_namespace(db_review.manga_id))
+        return db_review
+    
+    # Buffered only once committed; listings see it after the next flush, this response now
+    like_counter.add(review_id, delta)
+    result = ReviewSchema.model_validate(db_review)
+    result.likes += like_counter.pending(review_id)
+    return result
@@ -1,18 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import timedelta
 
-from app.db.database import get_db
+from app.db.database import get_async_db, get_async_read_db
 from app.models.user import User
 from app.schemas.user import UserCreate, User as UserSchema, UserUpdate, Token
 from app.services.auth import (
     authenticate_user,
     create_access_token,
     get_password_hash,
-    get_current_active_user,
-    get_current_admin_user,
+    get_current_active_user_async,
+    get_current_admin_user_async,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
@@ -20,9 +22,9 @@ router = APIRouter(prefix="/api/users", tags=["users"])
 
 
 @router.post("/register", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user with this email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,7 +32,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username is taken
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -38,21 +40,21 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     db_user = User(
         username=user.username,
         email=user.email,
         password_hash=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,35 +69,36 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 
 
 @router.get("/me", response_model=UserSchema)
-def read_users_me(current_user: User = Depends(get_current_active_user)):
+async def read_users_me(current_user: User = Depends(get_current_active_user_async)):
     return current_user
 
 
 @router.put("/me", response_model=UserSchema)
-def update_user(
+async def update_user(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Update user information
     update_data = user_update.dict(exclude_unset=True)
     
     # If updating password, hash it
     if "password" in update_data:
-        update_data["password_hash"] = get_password_hash(update_data.pop("password"))
+        update_data["password_hash"] = await run_in_threadpool(get_password_hash, update_data.pop("password"))
     
     # Update user attributes
     for key, value in update_data.items():
         setattr(current_user, key, value)
     
-    db.commit()
-    db.refresh(current_user)
+    # current_user was loaded through this request's session, so it is tracked here
+    await db.commit()
+    await db.refresh(current_user)
     return current_user
 
 
 @router.get("/{user_id}", response_model=UserSchema)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def read_user(user_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_user = await db.get(User, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
@@ -103,11 +106,11 @@ def read_user(user_id: int, db: Session = Depends(get_db)):
 
 # Admin routes
 @router.get("/", response_model=List[UserSchema])
-def read_users(
+async def read_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = (await db.scalars(select(User).offset(skip).limit(limit))).all()
     return users 
\ No newline at end of file
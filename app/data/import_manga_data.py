@@ -11,6 +11,8 @@ sys.path.append(parent_dir)
 
 from app.db.database import SQLALCHEMY_DATABASE_URL, Base, engine
 from app.models.manga import Manga
+from app.models import tag  # noqa: F401 - registers the tags tables
+from app.services.manga_service import rebuild_tag_index
 
 def import_manga_data(csv_path):
     """Import manga data from CSV file into the database"""
@@ -61,6 +63,10 @@ def import_manga_data(csv_path):
         
         # Commit changes
         session.commit()
+        
+        # Refresh the canonical tag tables used for tag filtering
+        link_count = rebuild_tag_index(session)
+        print(f"Indexed {link_count} manga tags")
         print("Data import completed successfully!")
         return True
         
@@ -0,0 +1,28 @@
+"""Recount the per-user library stats from the library table.
+
+Library writes keep the counters current; run this to repair drift, e.g.
+after editing library rows by hand:
+
+    python -m app.data.rebuild_library_stats
+"""
+import sys
+
+from app.db.database import get_session_factory
+from app.models import user, manga, library, review, tag  # noqa: F401 - register models
+from app.services.library_service import rebuild_library_stats
+
+
+def main():
+    db = get_session_factory()()
+    try:
+        repaired = rebuild_library_stats(db)
+    finally:
+        db.close()
+    for user_id in repaired:
+        print(f"user {user_id}: stats recounted")
+    print(f"Repaired {len(repaired)} users" if repaired else "Library stats match the library")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
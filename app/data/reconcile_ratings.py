@@ -0,0 +1,38 @@
+"""Check the stored manga rating aggregates against the reviews table.
+
+    python -m app.data.reconcile_ratings         # report mismatches, exit 1 if any
+    python -m app.data.reconcile_ratings --fix   # also reset them from the reviews
+"""
+import argparse
+import sys
+
+from app.db.database import get_session_factory
+from app.models import user, manga, library, review, tag  # noqa: F401 - register models
+from app.services.manga_service import rating_mismatches, reconcile_manga_ratings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify manga rating_sum and rating_count against the reviews")
+    parser.add_argument("--fix", action="store_true", help="reset mismatched aggregates from the reviews")
+    args = parser.parse_args(argv)
+
+    db = get_session_factory()()
+    try:
+        mismatches = reconcile_manga_ratings(db) if args.fix else rating_mismatches(db)
+    finally:
+        db.close()
+
+    for manga_id, stored_sum, stored_count, actual_sum, actual_count in mismatches:
+        print(f"manga {manga_id}: stored {stored_sum}/{stored_count}, reviews {actual_sum}/{actual_count}")
+    if not mismatches:
+        print("Rating aggregates match the reviews")
+        return 0
+    if args.fix:
+        print(f"Reset {len(mismatches)} manga")
+        return 0
+    print(f"{len(mismatches)} manga out of sync; rerun with --fix to reset them")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""Recount library entries and recent reviews and rescore the 'popular' sort.
+
+Review and library writes keep the scores current between runs; this batch
+ages out old reviews from the activity bonus. Run it periodically, e.g. hourly:
+
+    python -m app.data.refresh_popularity
+"""
+import sys
+
+from app.db.database import get_session_factory
+from app.models import user, manga, library, review, tag  # noqa: F401 - register models
+from app.services.popularity import recompute_popularity
+
+
+def main():
+    db = get_session_factory()()
+    try:
+        changed = recompute_popularity(db)
+    finally:
+        db.close()
+    print(f"Rescored {changed} manga")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
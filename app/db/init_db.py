@@ -0,0 +1,21 @@
+"""Create the schema directly from the models, for local SQLite databases.
+
+PostgreSQL databases are managed with Alembic (`alembic upgrade head`).
+
+    DATABASE_URL=sqlite:///./mangalist.db python -m app.db.init_db
+"""
+from app.db.database import Base, get_engine
+from app.models import user, manga, library, review, tag  # noqa: F401 - register models
+
+
+def init_db():
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    # Add full-text search objects to databases created before they existed
+    with engine.begin() as connection:
+        manga.ensure_fulltext_search(connection)
+
+
+if __name__ == "__main__":
+    init_db()
+    print("Database schema created")
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Connection pool settings for server databases (SQLite keeps SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Replace connections older than this many seconds; -1 keeps them forever
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Checkouts that wait longer than this are counted as slow
+DB_POOL_SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "50"))
+
+
+class PoolMetrics:
+    """Checkout wait times, overflow and timeout counts for one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.peak_checked_out = 0
+
+    def record(self, wait_ms: float, overflow: bool, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            if wait_ms >= DB_POOL_SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+            if overflow:
+                self.overflow_checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+# QueuePool._do_get retries by calling itself; only the outermost call is timed.
+# A context variable rather than a thread local, since the async pool runs
+# concurrent checkouts in greenlets on one thread.
+_in_checkout = ContextVar("in_checkout", default=False)
+
+
+class _InstrumentedPoolMixin:
+    """Times how long each checkout waits for a connection from the queue"""
+
+    metrics = None
+
+    def _do_get(self):
+        if self.metrics is None or _in_checkout.get():
+            return super()._do_get()
+        token = _in_checkout.set(True)
+        try:
+            return self._timed_get()
+        finally:
+            _in_checkout.reset(token)
+
+    def _timed_get(self):
+        started = time.perf_counter()
+        overflow_before = self._overflow
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        # A new connection beyond pool_size was opened for this checkout
+        overflow = self._overflow > overflow_before and self._overflow > 0
+        self.metrics.record((time.perf_counter() - started) * 1000, overflow, self.checkedout())
+        return record
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, is_async: bool = False) -> dict:
+    """Engine keyword arguments for the configured pool; empty for SQLite"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# Engines whose pools are reported by the admin metrics endpoint
+_engines = {}
+
+
+def register_engine(name: str, engine):
+    """Attach metrics to an engine's pool and include it in ``pool_report``"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    if isinstance(pool, _InstrumentedPoolMixin) and pool.metrics is None:
+        pool.metrics = PoolMetrics()
+    _engines[name] = engine
+    return engine
+
+
+def pool_report():
+    """Live pool state and checkout metrics for every registered engine"""
+    report = {}
+    for name, engine in _engines.items():
+        pool = getattr(engine, "sync_engine", engine).pool
+        entry = {"pool": type(pool).__name__, "status": pool.status()}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        if isinstance(pool, _InstrumentedPoolMixin) and pool.metrics is not None:
+            entry.update(pool.metrics.as_dict())
+        report[name] = entry
+    return report
@@ -0,0 +1,48 @@
+"""Hot single-row lookups shared by the routers and services.
+
+Each lookup is a ``lambda_stmt``: SQLAlchemy builds and compiles the statement
+once per call site and afterwards only swaps in the new parameter values,
+skipping the Query construction and compile-cache key generation that
+``db.query(...).filter(...).first()`` repeats on every request.
+"""
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.library import Library
+from app.models.manga import Manga
+from app.models.review import Review
+from app.models.user import User
+
+
+def get_manga(db: Session, manga_id: int):
+    return db.execute(lambda_stmt(lambda: select(Manga).where(Manga.id == manga_id))).scalar()
+
+
+def get_manga_by_title(db: Session, title: str):
+    return db.execute(lambda_stmt(lambda: select(Manga).where(Manga.title == title))).scalar()
+
+
+def get_user(db: Session, user_id: int):
+    return db.execute(lambda_stmt(lambda: select(User).where(User.id == user_id))).scalar()
+
+
+async def get_user_async(db: AsyncSession, user_id: int):
+    result = await db.execute(lambda_stmt(lambda: select(User).where(User.id == user_id)))
+    return result.scalar()
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(lambda_stmt(lambda: select(User).where(User.email == email)))
+    return result.scalar()
+
+
+def get_library_entry(db: Session, user_id: int, manga_id: int):
+    return db.execute(lambda_stmt(
+        lambda: select(Library).where(Library.user_id == user_id, Library.manga_id == manga_id)
+    )).scalar()
+
+
+def get_review(db: Session, review_id: int):
+    return db.execute(lambda_stmt(lambda: select(Review).where(Review.id == review_id))).scalar()
+
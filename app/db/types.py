@@ -0,0 +1,35 @@
+from sqlalchemy import String, JSON, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+from sqlalchemy.types import TypeDecorator
+
+
+class StringArray(TypeDecorator):
+    """List of strings stored as a native ARRAY on PostgreSQL and as JSON elsewhere"""
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(ARRAY(String))
+        return dialect.type_descriptor(JSON())
+
+
+class Timestamp(TypeDecorator):
+    """DateTime that SQLite stores in the same text form as CURRENT_TIMESTAMP.
+
+    SQLite compares datetimes as strings, so values bound from Python (for
+    example keyset cursor bounds) must use the format of server-side defaults
+    like ``func.now()``, otherwise ``'... 12:00:00'`` sorts before
+    ``'... 12:00:00.000000'``.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(SQLITE_DATETIME(
+                storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d",
+                regexp=r"(\d+)-(\d+)-(\d+) (\d+):(\d+):(\d+)",
+            ))
+        return dialect.type_descriptor(DateTime())
@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(db, table):
+    """INSERT construct with ``on_conflict_do_*`` support for the session's database.
+
+    PostgreSQL and SQLite both support ``ON CONFLICT`` but through their own
+    dialect-specific ``insert()``.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
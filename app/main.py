@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
@@ -6,21 +8,49 @@ import time
 import os
 from typing import List
 
-from app.api import users, manga, library, reviews
-from app.models import user, manga as manga_model, library as library_model, review as review_model
-from app.db.database import engine, get_db
+from app.api import users, manga, library, reviews, admin
+from app.db.database import get_session_factory, pin_to_primary, dispose_engines
+from app.services.catalog_index import catalog_index, CATALOG_INDEX_ENABLED
+from app.services.like_counter import like_counter
+from app.services.tasks import task_runner
+
+# The schema is managed by Alembic (`alembic upgrade head`); for a local
+# SQLite database run `python -m app.db.init_db`. Nothing here touches the
+# database until the app starts serving.
+
+
+def open_session():
+    return get_session_factory()()
+
+
+def load_catalog_index():
+    db = open_session()
+    try:
+        catalog_index.load(db)
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve catalog searches from memory when enabled
+    if CATALOG_INDEX_ENABLED:
+        await run_in_threadpool(load_catalog_index)
+    # Flush write-behind like counters in the background (no-op when immediate)
+    like_counter.start(open_session)
+    yield
+    await run_in_threadpool(like_counter.stop, open_session)
+    # Let deferred work queued by the last requests finish
+    await run_in_threadpool(task_runner.shutdown)
+    await dispose_engines()
 
-# Create database tables
-user.Base.metadata.create_all(bind=engine)
-manga_model.Base.metadata.create_all(bind=engine)
-library_model.Base.metadata.create_all(bind=engine)
-review_model.Base.metadata.create_all(bind=engine)
 
 # Create FastAPI app
 app = FastAPI(
     title="MangaList API",
     description="API for tracking and discovering manga",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Set up CORS middleware
@@ -42,7 +72,7 @@ app.mount("/static", StaticFiles(directory=static_dir), name="static")
 @app.middleware("http")
 async def add_rate_limit(request: Request, call_next):
     # Simple rate limiting by IP
-    client_ip = request.client.host
+    client_ip = request.client.host if request.client else None
     # In a real app, use Redis to track request counts
     
     response = await call_next(request)
@@ -57,11 +87,21 @@ async def add_process_time_header(request: Request, call_next):
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
+# Keep a client on the primary database briefly after it writes, so reads
+# served from the replica don't hide its own changes
+@app.middleware("http")
+async def pin_reads_after_write(request: Request, call_next):
+    response = await call_next(request)
+    if request.method in ("POST", "PUT", "PATCH", "DELETE") and response.status_code < 400:
+        pin_to_primary(response)
+    return response
+
 # Include routers
 app.include_router(users.router)
 app.include_router(manga.router)
 app.include_router(library.router)
 app.include_router(reviews.router)
+app.include_router(admin.router)
 
 @app.get("/")
 def read_root():
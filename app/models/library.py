@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 from app.db.database import Base
@@ -22,4 +22,28 @@ class Library(Base):
     
     # Relationships
     user = relationship("User", back_populates="library_entries")
-    manga = relationship("Manga", back_populates="library_entries") 
\ No newline at end of file
+    manga = relationship("Manga", back_populates="library_entries")
+
+    __table_args__ = (
+        # A user's library filtered by status
+        Index("ix_library_user_id_status", user_id, status),
+    )
+ 
+
+class LibraryStats(Base):
+    """Per-user library counters, kept in step with every library write"""
+    __tablename__ = "library_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    entries = Column(Integer, nullable=False, default=0, server_default="0")
+    chapters_read = Column(Integer, nullable=False, default=0, server_default="0")
+    reading = Column(Integer, nullable=False, default=0, server_default="0")
+    completed = Column(Integer, nullable=False, default=0, server_default="0")
+    on_hold = Column(Integer, nullable=False, default=0, server_default="0")
+    dropped = Column(Integer, nullable=False, default=0, server_default="0")
+    plan_to_read = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+def status_column(status: StatusEnum) -> str:
+    """The library_stats counter for a status"""
+    return StatusEnum(status).name.lower()
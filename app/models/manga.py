@@ -1,6 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, Float, ARRAY
+from sqlalchemy import Column, Integer, String, Text, Float, DDL, Index, event, inspect, text
 from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.db.types import StringArray
+
+
+def _initial_popularity(context):
+    # An unreviewed manga, in no libraries yet, scores its catalog rating
+    return context.get_current_parameters().get("rating") or 0.0
 
 
 class Manga(Base):
@@ -10,10 +16,100 @@ class Manga(Base):
     title = Column(String, unique=True, index=True)
     description = Column(Text, nullable=True)
     rating = Column(Float, default=0.0)
+    # Running totals of review ratings; rating is their rounded average once reviewed
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Inputs and result of the 'popular' sort score, see app.services.popularity
+    library_count = Column(Integer, nullable=False, default=0, server_default="0")
+    recent_reviews = Column(Integer, nullable=False, default=0, server_default="0")
+    popularity = Column(Float, nullable=False, default=_initial_popularity, server_default="0")
     year = Column(Integer, nullable=True)
-    tags = Column(ARRAY(String), nullable=True)
+    tags = Column(StringArray, nullable=True)
     cover = Column(String, nullable=True)
-    
+
     # Relationships
     library_entries = relationship("Library", back_populates="manga")
-    reviews = relationship("Review", back_populates="manga") 
\ No newline at end of file
+    reviews = relationship("Review", back_populates="manga")
+    tag_entries = relationship("Tag", secondary="manga_tags", back_populates="manga")
+
+    __table_args__ = (
+        # Serves min_rating filters and the 'rating' ordering
+        Index("ix_manga_rating_title_id", rating.desc(), title, id),
+        # Serves the default 'popular' ordering and its keyset cursors
+        Index("ix_manga_popularity_title_id", popularity.desc(), title, id),
+    )
+
+
+# Full-text search over title and description.
+# PostgreSQL keeps a generated, weighted tsvector column (not mapped on the model)
+# with a GIN index. SQLite mirrors the same fields into an external-content FTS5
+# table that is kept in sync by triggers.
+POSTGRES_FULLTEXT_DDL = [
+    """
+    ALTER TABLE manga ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_manga_search_vector ON manga USING GIN (search_vector)",
+]
+
+SQLITE_FULLTEXT_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS manga_fts USING fts5(
+        title, description, content='manga', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS manga_fts_ai AFTER INSERT ON manga BEGIN
+        INSERT INTO manga_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS manga_fts_ad AFTER DELETE ON manga BEGIN
+        INSERT INTO manga_fts(manga_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS manga_fts_au AFTER UPDATE OF title, description ON manga BEGIN
+        INSERT INTO manga_fts(manga_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO manga_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+for _statement in POSTGRES_FULLTEXT_DDL:
+    event.listen(Manga.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+for _statement in SQLITE_FULLTEXT_DDL:
+    event.listen(Manga.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    Manga.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS manga_fts").execute_if(dialect="sqlite"),
+)
+
+
+def ensure_fulltext_search(connection):
+    """Create the full-text search objects on a database whose manga table already exists.
+
+    Tables created through ``create_all`` get them from the ``after_create``
+    hooks above; this covers databases created before full-text search was
+    added. A newly created FTS5 table is backfilled from the existing rows.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRES_FULLTEXT_DDL:
+            connection.execute(text(statement))
+    elif dialect == "sqlite":
+        if not inspect(connection).has_table("manga"):
+            return
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'manga_fts'")
+        ).first()
+        for statement in SQLITE_FULLTEXT_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text("INSERT INTO manga_fts(manga_fts) VALUES ('rebuild')"))
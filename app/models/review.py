@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.db.types import Timestamp
 
 
 class Review(Base):
@@ -12,13 +13,21 @@ class Review(Base):
     content = Column(Text)
     rating = Column(Integer)  # 1-5 rating
     likes = Column(Integer, default=0)
-    timestamp = Column(DateTime, default=func.now())
+    timestamp = Column(Timestamp, default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="reviews")
     manga = relationship("Manga", back_populates="reviews")
     like_entries = relationship("Like", back_populates="review")
 
+    __table_args__ = (
+        # One review per user and manga; also serves the user's-review lookup
+        Index("uq_reviews_user_id_manga_id", user_id, manga_id, unique=True),
+        # A manga's reviews in the 'likes' and 'newest' orders and their keyset cursors
+        Index("ix_reviews_manga_likes_timestamp_id", manga_id, likes.desc(), timestamp.desc(), id.desc()),
+        Index("ix_reviews_manga_timestamp_id", manga_id, timestamp.desc(), id.desc()),
+    )
+
 
 class Like(Base):
     __tablename__ = "likes"
@@ -28,4 +37,10 @@ class Like(Base):
     
     # Relationships
     user = relationship("User", back_populates="likes")
-    review = relationship("Review", back_populates="like_entries") 
\ No newline at end of file
+    review = relationship("Review", back_populates="like_entries")
+
+    __table_args__ = (
+        # The primary key leads with user_id; counting and clearing a review's likes goes by review
+        Index("ix_likes_review_id", review_id),
+    )
+ 
\ No newline at end of file
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Index
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+
+# Association between manga and their canonical tags. The primary key serves
+# "tags of a manga" lookups, the reversed index serves tag containment filters.
+manga_tags = Table(
+    "manga_tags",
+    Base.metadata,
+    Column("manga_id", Integer, ForeignKey("manga.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_manga_tags_tag_id_manga_id", "tag_id", "manga_id"),
+)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    # Lowercased lookup key, tags are matched case-insensitively
+    normalized = Column(String, unique=True, index=True, nullable=False)
+
+    # Relationships
+    manga = relationship("Manga", secondary=manga_tags, back_populates="tag_entries")
@@ -1,7 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Literal
 from app.models.library import StatusEnum
-from app.schemas.manga import Manga
+from app.schemas.manga import Manga, MangaCompact
+
+# Most operations accepted by one library batch request
+LIBRARY_BATCH_MAX = 2000
 
 
 class LibraryEntryBase(BaseModel):
@@ -18,6 +21,14 @@ class LibraryEntryUpdate(BaseModel):
     status: Optional[StatusEnum] = None
     progress: Optional[int] = None
 
+    @field_validator("status")
+    @classmethod
+    def status_not_null(cls, value):
+        # Leaving status out keeps it; an explicit null would clear it
+        if value is None:
+            raise ValueError("status can't be null")
+        return value
+
 
 class LibraryEntryInDB(LibraryEntryBase):
     user_id: int
@@ -31,5 +42,70 @@ class LibraryEntry(LibraryEntryInDB):
     manga: Optional[Manga] = None
 
 
+class LibraryEntryCompact(LibraryEntryInDB):
+    """Library entry with the compact manga projection"""
+    manga: Optional[MangaCompact] = None
+
+
 class LibraryList(BaseModel):
-    entries: List[LibraryEntry] 
\ No newline at end of file
+    entries: List[LibraryEntry]
+    # Pass back as ``cursor`` to fetch the next page; None on the last page or without a limit
+    next_cursor: Optional[str] = None
+
+
+class LibraryCompactList(BaseModel):
+    entries: List[LibraryEntryCompact]
+    next_cursor: Optional[str] = None 
+
+class LibraryBatchOperation(BaseModel):
+    """One add, update, upsert or remove in a batch; unset fields keep their current or default value"""
+    op: Literal["add", "update", "upsert", "remove"]
+    manga_id: int
+    status: Optional[StatusEnum] = None
+    progress: Optional[int] = None
+
+
+class LibraryBatchRequest(BaseModel):
+    operations: List[LibraryBatchOperation] = Field(..., max_length=LIBRARY_BATCH_MAX)
+
+
+class LibraryBatchResult(BaseModel):
+    manga_id: int
+    op: str
+    # created, updated, removed or error
+    result: str
+    detail: Optional[str] = None
+
+
+class LibraryBatchResponse(BaseModel):
+    results: List[LibraryBatchResult]
+    applied: int
+    failed: int
+
+
+
+class LibraryImportError(BaseModel):
+    # Line of the uploaded file the row started on
+    line: int
+    detail: str
+
+
+class LibraryImportResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[LibraryImportError]
+
+class LibraryStats(BaseModel):
+    """A user's library totals, one counter per status"""
+    user_id: int
+    entries: int = 0
+    chapters_read: int = 0
+    reading: int = 0
+    completed: int = 0
+    on_hold: int = 0
+    dropped: int = 0
+    plan_to_read: int = 0
+
+    class Config:
+        from_attributes = True
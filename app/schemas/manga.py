@@ -35,6 +35,52 @@ class Manga(MangaInDB):
     pass
 
 
+class MangaCompact(BaseModel):
+    """Manga without description and tags, for long listings"""
+    id: int
+    title: str
+    year: Optional[int] = None
+    cover: Optional[str] = None
+    rating: float = 0.0
+
+    class Config:
+        from_attributes = True
+
+
+class TagCount(BaseModel):
+    name: str
+    count: int
+
+
+class YearCount(BaseModel):
+    year: int
+    count: int
+
+
+class RatingBandCount(BaseModel):
+    min: int
+    max: int
+    count: int
+
+
+class SearchFacets(BaseModel):
+    tags: List[TagCount]
+    years: List[YearCount]
+    ratings: List[RatingBandCount]
+
+
 class MangaSearchResults(BaseModel):
     results: List[Manga]
-    total: int 
\ No newline at end of file
+    total: int
+    # False when total is a planner estimate (show it as "~12,000 results")
+    total_is_exact: bool = True
+    # Pass back as ``cursor`` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+    # Counts for the current filters, only when requested with include_facets
+    facets: Optional[SearchFacets] = None
+
+
+class MangaSuggestion(BaseModel):
+    id: int
+    title: str
+    cover: Optional[str] = None
@@ -36,4 +36,6 @@ class Review(ReviewInDB):
 
 class ReviewList(BaseModel):
     reviews: List[Review]
-    total: int 
\ No newline at end of file
+    total: int
+    # Pass back as ``cursor`` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None 
\ No newline at end of file
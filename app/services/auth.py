@@ -3,11 +3,15 @@ from typing import Optional
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from pydantic import ValidationError
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.db.database import get_async_db, get_db
+from app.db import repository
 from app.schemas.user import TokenData
 from app.models.user import User
 import os
@@ -35,9 +39,10 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.password_hash):
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await repository.get_user_by_email_async(db, email)
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not user or not await run_in_threadpool(verify_password, password, user.password_hash):
         return False
     return user
 
@@ -53,7 +58,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _token_user_id(token: str) -> int:
+    """The user id a bearer token was issued for; raises 401 if it isn't valid"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -65,24 +71,60 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         if user_id is None:
             raise credentials_exception
         token_data = TokenData(user_id=user_id)
-    except JWTError:
+    except (JWTError, ValidationError):
         raise credentials_exception
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    return token_data.user_id
+
+
+def _require_user(user: Optional[User]) -> User:
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
-    if not current_user.is_active:
+def _require_active(user: User) -> User:
+    if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
+    return user
 
 
-async def get_current_admin_user(current_user: User = Depends(get_current_user)):
-    if not current_user.is_admin:
+def _require_admin(user: User) -> User:
+    if not user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user 
\ No newline at end of file
+    return user
+
+
+# Sync routes (manga, library, reviews, admin) look the user up on the same
+# request session as the route, so a request holds a single connection
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    return _require_user(repository.get_user(db, _token_user_id(token)))
+
+
+def get_current_active_user(current_user: User = Depends(get_current_user)):
+    return _require_active(current_user)
+
+
+def get_current_admin_user(current_user: User = Depends(get_current_user)):
+    return _require_admin(current_user)
+
+
+# Async routes (users) use the AsyncSession
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    return _require_user(await repository.get_user_async(db, _token_user_id(token)))
+
+
+async def get_current_active_user_async(current_user: User = Depends(get_current_user_async)):
+    return _require_active(current_user)
+
+
+async def get_current_admin_user_async(current_user: User = Depends(get_current_user_async)):
+    return _require_admin(current_user)
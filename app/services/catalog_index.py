@@ -0,0 +1,434 @@
+import os
+import sys
+import time
+import threading
+import logging
+from bisect import bisect_left, bisect_right, insort
+
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.manga import Manga
+from app.services import manga_service
+from app.services.catalog_state import on_catalog_change
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search_facets import build_facets, rating_band
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Serve catalog searches from an in-process index loaded at startup
+CATALOG_INDEX_ENABLED = os.getenv("CATALOG_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+# Memory budget for the index; exceeding it is reported and logged, not enforced
+CATALOG_INDEX_MEMORY_BUDGET_MB = float(os.getenv("CATALOG_INDEX_MEMORY_BUDGET_MB", "256"))
+# Seconds before the index is reloaded, to pick up writes made by other
+# processes (workers, scripts); 0 keeps it until the next bulk change
+CATALOG_INDEX_MAX_AGE = float(os.getenv("CATALOG_INDEX_MAX_AGE", "300"))
+
+SORTS = ("popular", "rating", "newest", "title")
+
+
+def _bits_from_slots(slots):
+    """Build an int bitset from an iterable of slot numbers"""
+    slots = list(slots)
+    if not slots:
+        return 0
+    buf = bytearray((max(slots) >> 3) + 1)
+    for slot in slots:
+        buf[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _slots_from_bits(bits: int):
+    """Yield the slot numbers set in an int bitset, in ascending order"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for i, byte in enumerate(data):
+        if byte:
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield (i << 3) | bit
+
+
+class CatalogEntry:
+    """The fields of a manga that catalog responses need, held in memory"""
+    __slots__ = ("id", "title", "description", "year", "tags", "cover", "rating", "popularity")
+
+    def __init__(self, id, title, description, year, tags, cover, rating, popularity):
+        self.id = id
+        self.title = title or ""
+        self.description = description
+        self.year = year
+        self.tags = list(tags) if tags else tags
+        self.cover = cover
+        self.rating = rating or 0.0
+        self.popularity = popularity or 0.0
+
+    @classmethod
+    def from_manga(cls, manga):
+        return cls(manga.id, manga.title, manga.description, manga.year, manga.tags, manga.cover, manga.rating, manga.popularity)
+
+
+def _sort_values(entry: CatalogEntry, sort_by: str):
+    """The values a keyset cursor records for an entry, matching manga_service.search_manga"""
+    if sort_by == "rating":
+        return [entry.rating, entry.id]
+    if sort_by == "newest":
+        return [entry.year, entry.id]
+    if sort_by == "title":
+        return [entry.title, entry.id]
+    return [entry.popularity, entry.title, entry.id]
+
+
+def _order_key(sort_by: str, values):
+    """Ascending sort key for the cursor values of a sort order"""
+    if sort_by == "rating":
+        rating, manga_id = values
+        return (-(rating or 0.0), manga_id)
+    if sort_by == "newest":
+        year, manga_id = values
+        return (year is None, -(year or 0), manga_id)
+    if sort_by == "title":
+        title, manga_id = values
+        return (title, manga_id)
+    popularity, title, manga_id = values
+    return (-(popularity or 0.0), title, manga_id)
+
+
+class CatalogIndex:
+    """In-memory inverted index over the manga catalog.
+
+    Each manga gets a small integer slot. Tags and years map to int bitsets
+    over those slots, so filters combine with plain ``&``/``|``. Every
+    supported sort order is kept as a sorted list of keys, so a page is a walk
+    from the cursor position that skips rows outside the filter. Text searches
+    are left to the database, which also matches descriptions and stems words.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.ready = False
+        # Bumped by every change, so a load running at the same time knows
+        # its snapshot may already be stale
+        self._generation = 0
+        self.loaded_at = None
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}        # slot -> CatalogEntry
+            self.slot_by_id = {}     # manga id -> slot
+            self._free_slots = []
+            self._next_slot = 0
+            self.all_bits = 0
+            self.tag_bits = {}        # normalized tag -> bitset
+            self.tag_names = {}       # normalized tag -> display name
+            self.year_bits = {}       # year -> bitset
+            self.orders = {sort_by: [] for sort_by in SORTS}
+            self.ready = False
+            self._generation += 1
+
+    def invalidate(self):
+        """Drop the index after a bulk change; searches use the database until it is reloaded"""
+        self.clear()
+
+    # Loading and incremental maintenance
+
+    def load(self, db: Session):
+        """Build the index from the manga table"""
+        with self._lock:
+            generation = self._generation
+        tag_slots, year_slots, tag_names = {}, {}, {}
+        entries, slot_by_id = {}, {}
+        columns = (Manga.id, Manga.title, Manga.description, Manga.year, Manga.tags, Manga.cover, Manga.rating, Manga.popularity)
+        for slot, row in enumerate(db.query(*columns).yield_per(1000)):
+            entry = CatalogEntry(*row)
+            entries[slot] = entry
+            slot_by_id[entry.id] = slot
+            for tag, name in self._entry_tags(entry).items():
+                tag_slots.setdefault(tag, []).append(slot)
+                tag_names.setdefault(tag, name)
+            if entry.year is not None:
+                year_slots.setdefault(entry.year, []).append(slot)
+
+        with self._lock:
+            if generation != self._generation:
+                # Keep whatever was loaded before; the next search tries again
+                logger.info("Catalog changed while the index loaded; it will reload on the next search")
+                return
+            self.entries = entries
+            self.slot_by_id = slot_by_id
+            self._free_slots = []
+            self._next_slot = len(entries)
+            self.all_bits = _bits_from_slots(entries.keys())
+            self.tag_bits = {tag: _bits_from_slots(s) for tag, s in tag_slots.items()}
+            self.tag_names = tag_names
+            self.year_bits = {year: _bits_from_slots(s) for year, s in year_slots.items()}
+            self.orders = {
+                sort_by: sorted(_order_key(sort_by, _sort_values(entry, sort_by)) for entry in entries.values())
+                for sort_by in SORTS
+            }
+            self.ready = True
+            self.loaded_at = time.monotonic()
+
+        report = self.memory_report()
+        logger.info("Catalog index loaded: %d manga, %.1f MB", report["manga"], report["total_mb"])
+        if report["over_budget"]:
+            logger.warning(
+                "Catalog index uses %.1f MB, over its %.1f MB budget",
+                report["total_mb"], report["budget_mb"]
+            )
+
+    @staticmethod
+    def _entry_tags(entry: CatalogEntry):
+        """Normalized tags of an entry, mapped to their display names"""
+        tags = {}
+        for tag in entry.tags or []:
+            name = manga_service.clean_tag_name(tag)
+            if name:
+                tags.setdefault(name.lower(), name)
+        return tags
+
+    def _add(self, entry: CatalogEntry):
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = self._next_slot
+            self._next_slot += 1
+        bit = 1 << slot
+        self.entries[slot] = entry
+        self.slot_by_id[entry.id] = slot
+        self.all_bits |= bit
+        for tag, name in self._entry_tags(entry).items():
+            self.tag_bits[tag] = self.tag_bits.get(tag, 0) | bit
+            self.tag_names.setdefault(tag, name)
+        if entry.year is not None:
+            self.year_bits[entry.year] = self.year_bits.get(entry.year, 0) | bit
+        for sort_by in SORTS:
+            insort(self.orders[sort_by], _order_key(sort_by, _sort_values(entry, sort_by)))
+
+    def _remove(self, manga_id: int):
+        slot = self.slot_by_id.pop(manga_id, None)
+        if slot is None:
+            return
+        entry = self.entries.pop(slot)
+        mask = ~(1 << slot)
+        self.all_bits &= mask
+        for tag in self._entry_tags(entry):
+            self.tag_bits[tag] &= mask
+            if not self.tag_bits[tag]:
+                del self.tag_bits[tag]
+                del self.tag_names[tag]
+        if entry.year is not None:
+            self.year_bits[entry.year] &= mask
+            if not self.year_bits[entry.year]:
+                del self.year_bits[entry.year]
+        for sort_by in SORTS:
+            order = self.orders[sort_by]
+            del order[bisect_left(order, _order_key(sort_by, _sort_values(entry, sort_by)))]
+        self._free_slots.append(slot)
+
+    def upsert(self, manga):
+        """Add a manga to the index, or refresh it after an update"""
+        with self._lock:
+            self._generation += 1
+            if self.ready:
+                self._remove(manga.id)
+                self._add(CatalogEntry.from_manga(manga))
+
+    def remove(self, manga_id: int):
+        with self._lock:
+            self._generation += 1
+            if self.ready:
+                self._remove(manga_id)
+
+    def is_stale(self) -> bool:
+        return bool(CATALOG_INDEX_MAX_AGE) and self.loaded_at is not None and (
+            time.monotonic() - self.loaded_at > CATALOG_INDEX_MAX_AGE
+        )
+
+    # Queries
+
+    def _tag_filter_bits(self, tags: list, tag_mode: str):
+        wanted = {manga_service.clean_tag_name(tag).lower() for tag in tags} - {""}
+        if not wanted:
+            return None
+        if tag_mode == "any":
+            bits = 0
+            for tag in wanted:
+                bits |= self.tag_bits.get(tag, 0)
+            return bits
+        bits = self.all_bits
+        for tag in wanted:
+            bits &= self.tag_bits.get(tag, 0)
+        return bits
+
+    def _min_rating_bits(self, min_rating: float):
+        order = self.orders["rating"]
+        end = bisect_right(order, (-min_rating, float("inf")))
+        return _bits_from_slots(self.slot_by_id[key[-1]] for key in order[:end])
+
+    def filter_bits(self, tags: list = None, tag_mode: str = "all", year: int = None, min_rating: float = 0):
+        """Bitset of the manga matching a set of search filters"""
+        bits = self.all_bits
+        if tags:
+            tag_bits = self._tag_filter_bits(tags, tag_mode)
+            if tag_bits is not None:
+                bits &= tag_bits
+        if year:
+            bits &= self.year_bits.get(year, 0)
+        if min_rating > 0:
+            bits &= self._min_rating_bits(min_rating)
+        return bits
+
+    def search(self, tags: list = None, year: int = None, skip: int = 0, limit: int = 20,
+               min_rating: float = 0, sort_by: str = "popular", tag_mode: str = "all", cursor: str = None):
+        """Answer a catalog browse with the same filters, sorts and cursors as the database.
+
+        Returns ``(entries, total, total_is_exact, next_cursor)``. Without a
+        search term 'relevance' falls back to 'popular', as in the database.
+        """
+        with self._lock:
+            bits = self.filter_bits(tags, tag_mode, year, min_rating)
+            total = bits.bit_count()
+            if sort_by not in SORTS:
+                sort_by = "popular"
+            size = 3 if sort_by == "popular" else 2
+
+            after = _order_key(sort_by, decode_cursor(cursor, sort_by, size)) if cursor else None
+            keys = self._ordered_keys(sort_by, bits, total, after)
+
+            page = []
+            for i, k in enumerate(keys):
+                if after is None and i < skip:
+                    continue
+                page.append(self.entries[self.slot_by_id[k[-1]]])
+                if len(page) >= limit:
+                    break
+
+            next_cursor = None
+            if page and len(page) == limit:
+                next_cursor = encode_cursor(sort_by, _sort_values(page[-1], sort_by))
+            return page, total, True, next_cursor
+
+    def facets(self, tags: list = None, year: int = None, min_rating: float = 0, tag_mode: str = "all"):
+        """Tag, year and rating band counts for a set of filters, from the bitsets"""
+        with self._lock:
+            bits = self.filter_bits(tags, tag_mode, year, min_rating)
+            tag_counts = []
+            for tag, tag_bits in self.tag_bits.items():
+                count = (bits & tag_bits).bit_count()
+                if count:
+                    tag_counts.append((self.tag_names[tag], count))
+            year_counts = {}
+            for year_value, year_bits in self.year_bits.items():
+                count = (bits & year_bits).bit_count()
+                if count:
+                    year_counts[year_value] = count
+            band_counts = {}
+            for slot in _slots_from_bits(bits):
+                band = rating_band(self.entries[slot].rating)
+                band_counts[band] = band_counts.get(band, 0) + 1
+            return build_facets(tag_counts, year_counts, band_counts)
+
+    def _ordered_keys(self, sort_by: str, bits: int, total: int, after=None):
+        """Iterate the keys of the matching manga in sort order, starting after ``after``.
+
+        Sparse result sets are sorted directly; dense ones are streamed from
+        the pre-sorted order, testing membership against the bitset.
+        """
+        order = self.orders[sort_by]
+        if total * 8 <= len(order):
+            keys = sorted(
+                _order_key(sort_by, _sort_values(self.entries[slot], sort_by))
+                for slot in _slots_from_bits(bits)
+            )
+            return iter(keys[bisect_right(keys, after):] if after else keys)
+
+        start = bisect_right(order, after) if after else 0
+        if bits == self.all_bits:
+            return (order[i] for i in range(start, len(order)))
+
+        mask = bits.to_bytes((bits.bit_length() + 7) // 8 or 1, "little")
+        slot_by_id = self.slot_by_id
+
+        def matching():
+            for i in range(start, len(order)):
+                slot = slot_by_id[order[i][-1]]
+                byte = slot >> 3
+                if byte < len(mask) and mask[byte] >> (slot & 7) & 1:
+                    yield order[i]
+        return matching()
+
+    # Reporting
+
+    def memory_report(self):
+        """Approximate memory used by the index, broken down by structure"""
+        with self._lock:
+            entries = sum(
+                sys.getsizeof(entry)
+                + sum(sys.getsizeof(getattr(entry, field)) for field in ("title", "description", "cover"))
+                + (sys.getsizeof(entry.tags) + sum(sys.getsizeof(t) for t in entry.tags) if entry.tags else 0)
+                for entry in self.entries.values()
+            )
+            tags = sum(sys.getsizeof(t) + sys.getsizeof(b) for t, b in self.tag_bits.items())
+            years = sum(sys.getsizeof(y) + sys.getsizeof(b) for y, b in self.year_bits.items())
+            orders = sum(
+                sys.getsizeof(order) + sum(sys.getsizeof(k) for k in order)
+                for order in self.orders.values()
+            )
+            id_map = sys.getsizeof(self.slot_by_id) + sys.getsizeof(self.entries)
+            breakdown = {
+                "entries": entries,
+                "tag_bitsets": tags,
+                "year_buckets": years,
+                "sort_orders": orders,
+                "id_maps": id_map,
+            }
+            total = sum(breakdown.values())
+            return {
+                "ready": self.ready,
+                "manga": len(self.entries),
+                "tags": len(self.tag_bits),
+                "years": len(self.year_bits),
+                "bytes": breakdown,
+                "total_mb": total / (1024 * 1024),
+                "budget_mb": CATALOG_INDEX_MEMORY_BUDGET_MB,
+                "over_budget": total > CATALOG_INDEX_MEMORY_BUDGET_MB * 1024 * 1024,
+            }
+
+
+catalog_index = CatalogIndex()
+_load_lock = threading.Lock()
+
+
+def catalog_index_ready(db: Session) -> bool:
+    """Whether the index can answer a search, loading it when enabled and missing.
+
+    A bulk change drops the index and the next search reloads it, like the
+    title suggestions. Once CATALOG_INDEX_MAX_AGE has passed, one request
+    reloads it while the others keep using the loaded copy.
+    """
+    if not CATALOG_INDEX_ENABLED:
+        return catalog_index.ready
+    if not catalog_index.ready:
+        with _load_lock:
+            if not catalog_index.ready:
+                catalog_index.load(db)
+    elif catalog_index.is_stale() and _load_lock.acquire(blocking=False):
+        try:
+            catalog_index.load(db)
+        finally:
+            _load_lock.release()
+    return catalog_index.ready
+
+
+@on_catalog_change
+def _sync_catalog_index(manga_id, deleted, manga):
+    if deleted:
+        catalog_index.remove(manga_id)
+    elif manga is not None:
+        catalog_index.upsert(manga)
+    else:
+        # Bulk change without the rows at hand: reload on the next search
+        catalog_index.invalidate()
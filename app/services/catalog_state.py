@@ -0,0 +1,34 @@
+import threading
+
+
+# Process-wide version of the manga catalog. Anything cached from manga rows
+# (search totals, tag vocabulary, ...) stores the version it was built from and
+# is stale once the version moves on.
+_version = 0
+_version_lock = threading.Lock()
+
+# Callbacks run after every catalog write as callback(manga_id, deleted, manga)
+_listeners = []
+
+
+def get_catalog_version():
+    return _version
+
+
+def on_catalog_change(callback):
+    """Register a callback to run after manga are created, updated or deleted"""
+    _listeners.append(callback)
+    return callback
+
+
+def catalog_changed(manga_id: int = None, deleted: bool = False, manga=None):
+    """Record a committed write to the manga catalog and notify listeners.
+
+    ``manga`` is the written row when available, so listeners can update
+    in-memory copies without querying it again.
+    """
+    global _version
+    with _version_lock:
+        _version += 1
+    for callback in list(_listeners):
+        callback(manga_id, deleted, manga)
@@ -0,0 +1,75 @@
+import os
+import random
+import logging
+from contextlib import contextmanager
+from time import perf_counter
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("app.search")
+
+# Search tracing is off by default; when on, only a sample of requests is traced
+SEARCH_TRACE_ENABLED = os.getenv("SEARCH_TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+SEARCH_TRACE_SAMPLE_RATE = float(os.getenv("SEARCH_TRACE_SAMPLE_RATE", "0.1"))
+# Traces slower than this are logged at WARNING instead of INFO
+SEARCH_TRACE_SLOW_MS = float(os.getenv("SEARCH_TRACE_SLOW_MS", "250"))
+
+
+class SearchTrace:
+    """Timing and filter shape of one sampled search request.
+
+    Fields are logged as a single record on the ``app.search`` logger, both in
+    the message and as ``record.search`` for structured handlers.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self.sql_ms = 0.0
+        self._started = perf_counter()
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    @contextmanager
+    def sql(self):
+        """Time a block of database work"""
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.sql_ms += (perf_counter() - started) * 1000
+
+    def finish(self, **fields):
+        self.fields.update(fields)
+        self.fields["sql_ms"] = round(self.sql_ms, 3)
+        self.fields["total_ms"] = round((perf_counter() - self._started) * 1000, 3)
+        level = logging.WARNING if self.fields["total_ms"] >= SEARCH_TRACE_SLOW_MS else logging.INFO
+        if logger.isEnabledFor(level):
+            message = " ".join(f"{key}={value}" for key, value in self.fields.items())
+            logger.log(level, "manga search %s", message, extra={"search": dict(self.fields)})
+
+
+class NullTrace:
+    """Stand-in for unsampled requests; every method is a no-op"""
+
+    def set(self, **fields):
+        pass
+
+    @contextmanager
+    def sql(self):
+        yield
+
+    def finish(self, **fields):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+def start_search_trace(**fields):
+    """Start tracing a search if tracing is enabled and this request is sampled"""
+    if not SEARCH_TRACE_ENABLED or random.random() >= SEARCH_TRACE_SAMPLE_RATE:
+        return NULL_TRACE
+    return SearchTrace(**fields)
@@ -0,0 +1,374 @@
+import io
+import csv
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, contains_eager
+
+from app.models.library import Library, LibraryStats, StatusEnum, status_column
+from app.models.manga import Manga
+from app.schemas.library import LibraryEntry, LibraryEntryCompact, LibraryBatchOperation
+from app.db.upsert import dialect_insert
+from app.services import popularity
+from app.services.pagination import paginate
+
+# Most entries a single page can ask for
+LIBRARY_PAGE_MAX = 500
+# Rows fetched per round trip while streaming a library
+LIBRARY_STREAM_BATCH = 500
+# Rows per multi-row INSERT when applying a batch
+LIBRARY_BATCH_CHUNK = 500
+
+# Library listings are ordered by title, ending in manga_id for stable cursors
+LIBRARY_SORT = "library"
+LIBRARY_SORT_COLUMNS = [(Manga.title, False), (Library.manga_id, False)]
+
+# Views a listing can be returned in, with the schema for one entry
+LIBRARY_VIEWS = {"full": LibraryEntry, "compact": LibraryEntryCompact}
+
+# Rows per transaction when importing a library file
+LIBRARY_IMPORT_CHUNK = 1000
+# Columns of an export, and what an import reads back
+LIBRARY_EXPORT_FIELDS = ("manga_id", "title", "status", "progress")
+LIBRARY_EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Columns of a user's library_stats row
+STATS_COUNTERS = ("entries", "chapters_read") + tuple(status_column(status) for status in StatusEnum)
+
+
+def library_query(db: Session, user_id: int, status: StatusEnum = None, view: str = "full"):
+    """A user's library entries with their manga filled from the same joined row.
+
+    The compact view selects only the manga columns it returns, leaving out
+    the description and tags.
+    """
+    query = db.query(Library).filter(Library.user_id == user_id)
+    if status:
+        query = query.filter(Library.status == status)
+    manga = contains_eager(Library.manga)
+    if view == "compact":
+        manga = manga.load_only(Manga.id, Manga.title, Manga.year, Manga.cover, Manga.rating)
+    return query.join(Manga).options(manga)
+
+
+def get_library_page(db: Session, user_id: int, status: StatusEnum = None, view: str = "full",
+                     limit: int = None, cursor: str = None):
+    """Entries and next cursor; the whole library when no limit is given"""
+    query = library_query(db, user_id, status, view)
+    if limit is None and not cursor:
+        return query.order_by(Manga.title, Library.manga_id).all(), None
+    return paginate(query, LIBRARY_SORT, LIBRARY_SORT_COLUMNS, limit=limit or LIBRARY_PAGE_MAX, cursor=cursor)
+
+
+def iter_library_ndjson(db: Session, user_id: int, status: StatusEnum = None, view: str = "full"):
+    """Yield a library as newline-delimited JSON, one entry per line.
+
+    Rows come from a server-side cursor in batches of LIBRARY_STREAM_BATCH,
+    so memory stays flat however large the library is. Closes ``db`` when
+    done, since the response outlives the request's dependencies.
+    """
+    schema = LIBRARY_VIEWS[view]
+    query = library_query(db, user_id, status, view).order_by(Manga.title, Library.manga_id)
+    try:
+        for entry in query.yield_per(LIBRARY_STREAM_BATCH):
+            yield schema.model_validate(entry).model_dump_json().encode() + b"\n"
+            # Rows already written don't need to stay in the identity map
+            db.expunge(entry.manga)
+            db.expunge(entry)
+    finally:
+        db.close()
+
+
+def apply_library_batch(db: Session, user_id: int, operations):
+    """Apply a list of add, update, upsert and remove operations in one transaction.
+
+    Manga and existing entries are looked up with one IN query each, the
+    operations are resolved in order against that snapshot (so a later
+    operation sees an earlier one in the same batch), and the outcome is
+    written with one multi-row upsert and one DELETE, plus the library
+    count and stats counter updates. Operations that fail
+    validation are reported and skipped; the rest still apply.
+
+    Returns the per-operation results and the ids of the manga whose library
+    count changed.
+    """
+    manga_ids = {operation.manga_id for operation in operations}
+    known = {manga_id for (manga_id,) in db.query(Manga.id).filter(Manga.id.in_(manga_ids))} if manga_ids else set()
+    existing = {
+        entry.manga_id: {"status": entry.status, "progress": entry.progress}
+        for entry in db.query(Library.manga_id, Library.status, Library.progress).filter(
+            Library.user_id == user_id, Library.manga_id.in_(manga_ids)
+        )
+    } if manga_ids else {}
+
+    entries = dict(existing)  # manga id -> fields after the operations so far
+    results = []
+    for operation in operations:
+        manga_id = operation.manga_id
+        fields = {key: value for key, value in (("status", operation.status), ("progress", operation.progress))
+                  if value is not None}
+        error = None
+        if operation.op in ("add", "upsert") and manga_id not in entries:
+            if manga_id not in known:
+                error = "Manga not found"
+            else:
+                entries[manga_id] = {"status": StatusEnum.PLAN_TO_READ, "progress": 0, **fields}
+                result = "created"
+        elif operation.op == "add":
+            error = "Manga already in library"
+        elif manga_id not in entries:
+            error = "Library entry not found"
+        elif operation.op in ("update", "upsert"):
+            entries[manga_id] = {**entries[manga_id], **fields}
+            result = "updated"
+        else:
+            del entries[manga_id]
+            result = "removed"
+        if error:
+            results.append({"manga_id": manga_id, "op": operation.op, "result": "error", "detail": error})
+        else:
+            results.append({"manga_id": manga_id, "op": operation.op, "result": result})
+
+    upserts = [
+        {"user_id": user_id, "manga_id": manga_id, **values}
+        for manga_id, values in entries.items() if existing.get(manga_id) != values
+    ]
+    removed = [manga_id for manga_id in existing if manga_id not in entries]
+    for start in range(0, len(upserts), LIBRARY_BATCH_CHUNK):
+        statement = dialect_insert(db, Library).values(upserts[start:start + LIBRARY_BATCH_CHUNK])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[Library.user_id, Library.manga_id],
+            set_={"status": statement.excluded.status, "progress": statement.excluded.progress},
+        ))
+    if removed:
+        db.query(Library).filter(Library.user_id == user_id, Library.manga_id.in_(removed)).delete(
+            synchronize_session=False
+        )
+
+    count_deltas = {manga_id: 1 for manga_id in entries if manga_id not in existing}
+    count_deltas.update({manga_id: -1 for manga_id in removed})
+    popularity.adjust_library_counts(db, count_deltas)
+    stats_deltas = {}
+    for manga_id in set(existing) | set(entries):
+        before, after = existing.get(manga_id), entries.get(manga_id)
+        if before != after:
+            library_stats_delta(
+                before and (before["status"], before["progress"]),
+                after and (after["status"], after["progress"]),
+                stats_deltas,
+            )
+    adjust_library_stats(db, user_id, stats_deltas)
+    db.commit()
+    return results, sorted(count_deltas)
+
+
+def library_stats_delta(before=None, after=None, deltas: dict = None):
+    """Counter changes for one entry going from ``before`` to ``after``.
+
+    Each side is ``(status, progress)``, or None when the entry doesn't
+    exist on that side. Entries without a status count towards the totals
+    only. Adds to ``deltas`` when given, to total a batch.
+    """
+    deltas = {} if deltas is None else deltas
+    for entry, sign in ((before, -1), (after, 1)):
+        if entry is None:
+            continue
+        status, progress = entry
+        counters = [("entries", 1), ("chapters_read", progress or 0)]
+        if status is not None:
+            counters.append((status_column(status), 1))
+        for counter, amount in counters:
+            deltas[counter] = deltas.get(counter, 0) + sign * amount
+    return deltas
+
+
+def adjust_library_stats(db: Session, user_id: int, deltas: dict):
+    """Add counter deltas to a user's stats row, creating it if needed; the caller commits"""
+    deltas = {counter: delta for counter, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    stats = LibraryStats.__table__
+    statement = dialect_insert(db, LibraryStats).values(user_id=user_id, **deltas)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[stats.c.user_id],
+        set_={counter: stats.c[counter] + statement.excluded[counter] for counter in deltas},
+    ))
+
+
+def get_library_stats(db: Session, user_id: int):
+    """A user's stats row, or None if they never had a library entry"""
+    return db.get(LibraryStats, user_id)
+
+
+def rebuild_library_stats(db: Session):
+    """Recount every user's stats from the library table; returns the user ids that were off"""
+    counted = {}
+    rows = (
+        db.query(Library.user_id, Library.status, func.count(), func.coalesce(func.sum(Library.progress), 0))
+        .group_by(Library.user_id, Library.status)
+    )
+    for user_id, status, count, progress in rows:
+        stats = counted.setdefault(user_id, dict.fromkeys(STATS_COUNTERS, 0))
+        stats["entries"] += count
+        stats["chapters_read"] += progress
+        if status is not None:
+            stats[status_column(status)] += count
+
+    stored = {
+        row.user_id: {counter: getattr(row, counter) for counter in STATS_COUNTERS}
+        for row in db.query(LibraryStats)
+    }
+    empty = dict.fromkeys(STATS_COUNTERS, 0)
+    repaired = sorted(
+        user_id for user_id in set(counted) | set(stored)
+        if counted.get(user_id, empty) != stored.get(user_id, empty)
+    )
+    for user_id in repaired:
+        values = counted.get(user_id, empty)
+        statement = dialect_insert(db, LibraryStats).values(user_id=user_id, **values)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[LibraryStats.__table__.c.user_id], set_=values
+        ))
+    db.commit()
+    return repaired
+
+
+class InvalidImportError(ValueError):
+    """The uploaded file can't be read as a library export"""
+
+
+def iter_library_export(db: Session, user_id: int, format: str = "csv"):
+    """Yield a user's library as CSV or NDJSON, one row per entry.
+
+    Selects plain column tuples through a server-side cursor, so neither ORM
+    objects nor the whole result are held in memory. Closes ``db`` when done.
+    """
+    statement = (
+        select(Library.manga_id, Manga.title, Library.status, Library.progress)
+        .join(Manga, Manga.id == Library.manga_id)
+        .where(Library.user_id == user_id)
+        .order_by(Manga.title, Library.manga_id)
+        .execution_options(yield_per=LIBRARY_STREAM_BATCH)
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    try:
+        if format == "csv":
+            writer.writerow(LIBRARY_EXPORT_FIELDS)
+        for rows in db.execute(statement).partitions():
+            for manga_id, title, status, progress in rows:
+                status = status.value if status is not None else None
+                if format == "csv":
+                    writer.writerow((manga_id, title, status, progress))
+                else:
+                    buffer.write(json.dumps(dict(zip(LIBRARY_EXPORT_FIELDS, (manga_id, title, status, progress)))))
+                    buffer.write("\n")
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    finally:
+        db.close()
+
+
+def read_library_import(file, format: str = "csv"):
+    """Yield ``(line, row)`` from an uploaded export, decoding as it reads.
+
+    ``file`` is a binary file object; rows are dicts keyed by the export
+    columns. Raises InvalidImportError for a file that isn't an export at
+    all: bad encoding, a missing CSV header, a line that isn't a JSON object
+    or a field of the wrong JSON type.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if format == "csv":
+            reader = csv.DictReader(text)
+            if not reader.fieldnames or not {"manga_id", "title"} & set(reader.fieldnames):
+                raise InvalidImportError("CSV needs a header row with a manga_id or title column")
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line, raw in enumerate(text, start=1):
+                if not raw.strip():
+                    continue
+                try:
+                    row = json.loads(raw)
+                except ValueError:
+                    row = None
+                if not isinstance(row, dict):
+                    raise InvalidImportError(f"Line {line} is not a JSON object")
+                for field in LIBRARY_EXPORT_FIELDS:
+                    value = row.get(field)
+                    if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int))):
+                        raise InvalidImportError(f"Line {line}: {field} must be a string or an integer")
+                yield line, row
+    except UnicodeDecodeError:
+        raise InvalidImportError("File is not UTF-8 text")
+    finally:
+        # Leave the upload open for its owner to close
+        text.detach()
+
+
+def _import_operation(row: dict, manga_ids: dict):
+    """The upsert a row asks for, or the reason it can't be applied"""
+    try:
+        manga_id = row.get("manga_id")
+        manga_id = int(manga_id) if manga_id not in (None, "") else manga_ids.get(str(row.get("title")))
+        status = row.get("status") or None
+        progress = row.get("progress")
+        progress = int(progress) if progress not in (None, "") else None
+        operation = LibraryBatchOperation(op="upsert", manga_id=manga_id or 0, status=status, progress=progress)
+    except (TypeError, ValueError):
+        return None, "Invalid manga_id, status or progress"
+    if not manga_id:
+        return None, "Manga not found"
+    return operation, None
+
+
+def import_library(db: Session, user_id: int, file, format: str = "csv"):
+    """Upsert an uploaded export into a user's library, LIBRARY_IMPORT_CHUNK rows at a time.
+
+    The file is read twice: once to check it parses, so a malformed file is
+    rejected with InvalidImportError before anything is written, then to
+    apply it. Each chunk resolves its titles with one IN query and is written
+    by ``apply_library_batch`` in its own transaction, so a row that can't be
+    applied never rolls back the others. Returns the counts, per-line errors
+    and the ids of the manga whose library count changed.
+    """
+    for _ in read_library_import(file, format):
+        pass
+    file.seek(0)
+    summary = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+    changed = set()
+
+    def apply(chunk):
+        titles = {str(row["title"]) for _, row in chunk if not row.get("manga_id") and row.get("title")}
+        manga_ids = dict(db.query(Manga.title, Manga.id).filter(Manga.title.in_(titles))) if titles else {}
+        lines, operations = [], []
+        for line, row in chunk:
+            operation, error = _import_operation(row, manga_ids)
+            if error:
+                summary["failed"] += 1
+                summary["errors"].append({"line": line, "detail": error})
+            else:
+                lines.append(line)
+                operations.append(operation)
+        results, changed_ids = apply_library_batch(db, user_id, operations)
+        changed.update(changed_ids)
+        for line, result in zip(lines, results):
+            if result["result"] == "error":
+                summary["failed"] += 1
+                summary["errors"].append({"line": line, "detail": result["detail"]})
+            else:
+                summary[result["result"]] += 1
+
+    chunk = []
+    for line, row in read_library_import(file, format):
+        chunk.append((line, row))
+        if len(chunk) == LIBRARY_IMPORT_CHUNK:
+            apply(chunk)
+            chunk = []
+    if chunk:
+        apply(chunk)
+    return summary, sorted(changed)
@@ -0,0 +1,217 @@
+import os
+import uuid
+import threading
+import logging
+
+from sqlalchemy import bindparam, delete, update
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.db.upsert import dialect_insert
+from app.models.review import Like, Review
+from app.services.response_cache import REDIS_URL, response_cache, reviews_namespace
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How review like counters are written:
+#   immediate - UPDATE reviews.likes in the same transaction as the like
+#   memory    - buffer deltas per process and flush them in batches
+#   redis     - buffer deltas in Redis, shared by every worker
+LIKE_COUNTER_MODE = os.getenv("LIKE_COUNTER_MODE", "immediate")
+# Seconds between flushes of buffered like counts
+LIKE_FLUSH_INTERVAL = float(os.getenv("LIKE_FLUSH_INTERVAL", "1.0"))
+
+_reviews = Review.__table__
+
+
+def toggle_like(db: Session, user_id: int, review_id: int) -> int:
+    """Like a review, or unlike it if already liked; returns the change in likes.
+
+    A DELETE, and an insert that ignores conflicts when nothing was deleted,
+    so two clicks racing each other never both count. The caller commits.
+    """
+    result = db.execute(delete(Like).where(Like.user_id == user_id, Like.review_id == review_id))
+    if result.rowcount:
+        return -1
+    statement = dialect_insert(db, Like).values(user_id=user_id, review_id=review_id).on_conflict_do_nothing()
+    return 1 if db.execute(statement).rowcount else 0
+
+
+def apply_like_deltas(db: Session, deltas: dict):
+    """Add ``{review_id: delta}`` to the stored counters as one batched UPDATE; the caller commits"""
+    rows = [{"review_id": review_id, "delta": delta} for review_id, delta in deltas.items() if delta]
+    if rows:
+        statement = (
+            update(_reviews)
+            .where(_reviews.c.id == bindparam("review_id"))
+            .values(likes=_reviews.c.likes + bindparam("delta"))
+        )
+        db.execute(statement, rows)
+
+
+class MemoryLikeBuffer:
+    """Pending like deltas held in this process"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._deltas = {}
+        self._lock = threading.Lock()
+
+    def add(self, review_id: int, delta: int):
+        with self._lock:
+            self._deltas[review_id] = self._deltas.get(review_id, 0) + delta
+
+    def pending(self, review_id: int) -> int:
+        return self._deltas.get(review_id, 0)
+
+    def drain(self) -> dict:
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        return deltas
+
+    def restore(self, deltas: dict):
+        for review_id, delta in deltas.items():
+            self.add(review_id, delta)
+
+
+class RedisLikeBuffer:
+    """Pending like deltas in a Redis hash, so any worker can flush them"""
+
+    name = "redis"
+
+    def __init__(self, client=None, url: str = REDIS_URL, key: str = "likes:pending"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.key = key
+
+    def add(self, review_id: int, delta: int):
+        self.client.hincrby(self.key, review_id, delta)
+
+    def pending(self, review_id: int) -> int:
+        value = self.client.hget(self.key, review_id)
+        return int(value) if value is not None else 0
+
+    def drain(self) -> dict:
+        from redis.exceptions import ResponseError
+
+        # RENAME is atomic: increments made after it land in a fresh hash, and
+        # a worker flushing at the same time finds nothing left to rename
+        draining = f"{self.key}:flushing:{uuid.uuid4().hex}"
+        try:
+            self.client.rename(self.key, draining)
+        except ResponseError:
+            return {}
+        deltas = {int(review_id): int(delta) for review_id, delta in self.client.hgetall(draining).items()}
+        self.client.delete(draining)
+        return deltas
+
+    def restore(self, deltas: dict):
+        for review_id, delta in deltas.items():
+            self.add(review_id, delta)
+
+
+def create_buffer(mode: str = LIKE_COUNTER_MODE):
+    if mode == "memory":
+        return MemoryLikeBuffer()
+    if mode == "redis":
+        return RedisLikeBuffer()
+    return None
+
+
+class LikeCounter:
+    """Writes like counter changes immediately or through a write-behind buffer.
+
+    In write-behind mode a like only inserts or deletes its ``likes`` row; the
+    counter change is buffered and applied to ``reviews.likes`` in batches by
+    ``flush``, so concurrent likers of one review don't queue on its row lock.
+    """
+
+    def __init__(self, buffer=None):
+        self.buffer = buffer if buffer is not None else create_buffer()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def write_behind(self) -> bool:
+        return self.buffer is not None
+
+    def configure(self, buffer):
+        """Swap the buffer, e.g. for tests; ``None`` switches to immediate updates"""
+        self.buffer = buffer
+
+    def record(self, db: Session, review_id: int, delta: int):
+        """Count a like change in the caller's transaction; buffered changes wait for ``add``"""
+        if delta and not self.write_behind:
+            apply_like_deltas(db, {review_id: delta})
+
+    def add(self, review_id: int, delta: int):
+        """Buffer a committed like change for the next flush"""
+        if delta and self.write_behind:
+            self.buffer.add(review_id, delta)
+
+    def pending(self, review_id: int) -> int:
+        """Buffered change not yet in ``reviews.likes``"""
+        return self.buffer.pending(review_id) if self.write_behind else 0
+
+    def flush(self, db: Session) -> int:
+        """Apply the buffered deltas; returns the number of reviews updated"""
+        if not self.write_behind:
+            return 0
+        with self._flush_lock:
+            deltas = {review_id: delta for review_id, delta in self.buffer.drain().items() if delta}
+            if not deltas:
+                return 0
+            try:
+                apply_like_deltas(db, deltas)
+                manga_ids = {
+                    manga_id for (manga_id,) in
+                    db.query(Review.manga_id).filter(Review.id.in_(list(deltas))).distinct()
+                }
+                db.commit()
+            except Exception:
+                db.rollback()
+                self.buffer.restore(deltas)
+                raise
+        for manga_id in manga_ids:
+            response_cache.invalidate(reviews_namespace(manga_id))
+        return len(deltas)
+
+    def start(self, open_session, interval: float = LIKE_FLUSH_INTERVAL):
+        """Flush from a background thread every ``interval`` seconds, each time in a new session"""
+        if not self.write_behind or self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self._flush_with(open_session)
+
+        self._thread = threading.Thread(target=run, name="like-counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self, open_session):
+        """Stop the background thread and flush what is left"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self.write_behind:
+            self._flush_with(open_session)
+
+    def _flush_with(self, open_session):
+        db = open_session()
+        try:
+            self.flush(db)
+        except Exception:
+            logger.exception("Flushing like counters failed; deltas kept for the next flush")
+        finally:
+            db.close()
+
+
+like_counter = LikeCounter()
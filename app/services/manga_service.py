@@ -1,90 +1,295 @@
+import re
+
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import Float, Numeric, case, cast, func, or_, literal_column, table, column, text, select, intersect, delete, insert, false
 from app.models.manga import Manga
+from app.models.tag import Tag, manga_tags
+from app.db.upsert import dialect_insert
+from app.db import repository
 from app.schemas.manga import MangaCreate, MangaUpdate
+from app.services.pagination import paginate
+from app.services.catalog_state import catalog_changed
+from app.services.search_count import count_search_results
+from app.services.catalog_index import catalog_index, catalog_index_ready
+from app.services.tag_vocabulary import get_tag_vocabulary
+from app.services.instrumentation import start_search_trace, NULL_TRACE
+from app.services.search_facets import database_facets
+from app.services import popularity
 
 
 def get_manga(db: Session, manga_id: int):
-    return db.query(Manga).filter(Manga.id == manga_id).first()
+    return repository.get_manga(db, manga_id)
 
 
 def get_manga_by_title(db: Session, title: str):
-    return db.query(Manga).filter(Manga.title == title).first()
+    return repository.get_manga_by_title(db, title)
 
 
 def get_manga_list(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Manga).offset(skip).limit(limit).all()
 
 
+def clean_tag_name(tag: str):
+    """Strip whitespace and leftover list punctuation from a raw tag"""
+    if not tag:
+        return ""
+    cleaned_tag = tag.replace("[", "").replace("]", "").replace("'", "").replace('"', "")
+    return " ".join(cleaned_tag.split())
+
+
 def get_all_tags(db: Session):
-    """Get all unique tags from manga entries"""
-    # Use unnest to flatten the tags arrays from all manga entries
-    result = db.query(func.unnest(Manga.tags)).distinct().all()
-    # Extract tags from result tuples and clean them
-    cleaned_tags = []
-    for tag in result:
-        if tag[0]:
-            # Clean the tag by removing all unwanted characters and whitespace
-            cleaned_tag = tag[0].strip()
-            # Remove any remaining brackets, quotes, and extra whitespace
-            cleaned_tag = cleaned_tag.replace("[", "").replace("]", "").replace("'", "").replace('"', "").strip()
-            if cleaned_tag:
-                cleaned_tags.append(cleaned_tag)
-    return sorted(list(set(cleaned_tags)))
-
-
-def search_manga(db: Session, search_term: str = None, tags: list = None, year: int = None, skip: int = 0, limit: int = 20, min_rating: float = 0, sort_by: str = 'popular'):
-    print(f"Searching manga with params: search={search_term}, tags={tags}, year={year}, skip={skip}, limit={limit}, min_rating={min_rating}, sort_by={sort_by}")
-    
+    """Get all unique tags that are attached to at least one manga"""
+    return get_tag_vocabulary(db).names
+
+
+def resolve_tag_ids(db: Session, tags: list):
+    """Map tag names to their ids with a single lookup.
+
+    Returns a dict keyed by normalized (lowercased) tag name; unknown tags are
+    left out.
+    """
+    keys = {clean_tag_name(tag).lower() for tag in tags} - {""}
+    if not keys:
+        return {}
+    rows = db.query(Tag.normalized, Tag.id).filter(Tag.normalized.in_(keys)).all()
+    return {normalized: tag_id for normalized, tag_id in rows}
+
+
+def get_or_create_tags(db: Session, tags: list):
+    """Return Tag rows for the given names, creating any that don't exist yet.
+
+    Missing tags are inserted with ``ON CONFLICT DO NOTHING`` and then
+    re-selected, so concurrent writers adding the same new tag don't fail on
+    the unique key.
+    """
+    names = {}
+    for tag in tags or []:
+        name = clean_tag_name(tag)
+        if name:
+            names.setdefault(name.lower(), name)
+    if not names:
+        return []
+
+    existing = {t.normalized: t for t in db.query(Tag).filter(Tag.normalized.in_(names.keys())).all()}
+    missing = [normalized for normalized in names if normalized not in existing]
+    if missing:
+        db.execute(
+            dialect_insert(db, Tag)
+            .values([{"name": names[normalized], "normalized": normalized} for normalized in missing])
+            .on_conflict_do_nothing(index_elements=["normalized"])
+        )
+        for t in db.query(Tag).filter(Tag.normalized.in_(missing)).all():
+            existing[t.normalized] = t
+    return [existing[normalized] for normalized in names]
+
+
+def set_manga_tags(db: Session, db_manga: Manga, tags: list):
+    """Keep the canonical tag links of a manga in line with its tag list"""
+    db_manga.tag_entries = get_or_create_tags(db, tags)
+
+
+def rebuild_tag_index(db: Session):
+    """Rebuild the tags/manga_tags tables from the tag lists stored on manga"""
+    rows = db.query(Manga.id, Manga.tags).all()
+    all_tags = [tag for _, tags in rows for tag in (tags or [])]
+    tag_ids = {t.normalized: t for t in get_or_create_tags(db, all_tags)}
+    db.flush()
+
+    links = set()
+    for manga_id, tags in rows:
+        for tag in tags or []:
+            normalized = clean_tag_name(tag).lower()
+            if normalized:
+                links.add((manga_id, tag_ids[normalized].id))
+
+    db.execute(delete(manga_tags))
+    if links:
+        db.execute(insert(manga_tags), [{"manga_id": m, "tag_id": t} for m, t in links])
+    db.commit()
+    catalog_changed()
+    return len(links)
+
+
+def filter_by_tags(db: Session, query, tags: list, tag_mode: str = 'all'):
+    """Filter a manga query by exact, case-insensitive tag membership.
+
+    Tag names are resolved to ids once, then each tag becomes a lookup on the
+    ``(tag_id, manga_id)`` index: ``all`` intersects the per-tag manga sets and
+    ``any`` takes their union.
+    """
+    wanted = {clean_tag_name(tag).lower() for tag in tags} - {""}
+    if not wanted:
+        return query
+    tag_ids = resolve_tag_ids(db, wanted)
+
+    if tag_mode == 'any':
+        if not tag_ids:
+            return query.filter(false())
+        matching = select(manga_tags.c.manga_id).where(manga_tags.c.tag_id.in_(tag_ids.values()))
+        return query.filter(Manga.id.in_(matching))
+
+    # Every requested tag must exist for any manga to carry all of them
+    if len(tag_ids) < len(wanted):
+        return query.filter(false())
+    per_tag = [
+        select(manga_tags.c.manga_id).where(manga_tags.c.tag_id == tag_id)
+        for tag_id in tag_ids.values()
+    ]
+    matching = per_tag[0] if len(per_tag) == 1 else intersect(*per_tag)
+    return query.filter(Manga.id.in_(matching))
+
+
+# FTS5 table maintained by triggers on SQLite (see app/models/manga.py)
+manga_fts = table("manga_fts", column("rowid"))
+
+# bm25 column weights for (title, description), mirroring the A/B tsvector
+# weights used on PostgreSQL so title matches rank higher on both backends
+MANGA_FTS_WEIGHTS = (10.0, 1.0)
+
+
+def _search_tokens(search_term: str):
+    """Split a search term into word tokens that are safe to embed in a text query"""
+    return re.findall(r"\w+", search_term.lower())
+
+
+def apply_fulltext_search(db: Session, query, search_term: str):
+    """Filter a manga query by full-text match on title and description.
+
+    Every token must match, and the last token also matches as a prefix so
+    partially typed words still find results. Returns the filtered query and a
+    relevance expression where higher values are better matches. If the term
+    has nothing to search for (no word tokens, or only stopwords on
+    PostgreSQL) the query is returned unfiltered with ``None`` as relevance.
+    """
+    tokens = _search_tokens(search_term)
+    if not tokens:
+        return query, None
+
+    if db.get_bind().dialect.name == "sqlite":
+        fts_query = " ".join(f'"{token}"' for token in tokens[:-1])
+        fts_query = f'{fts_query} "{tokens[-1]}"*'.strip()
+        query = query.join(manga_fts, manga_fts.c.rowid == Manga.id).filter(
+            text("manga_fts MATCH :fts_query").bindparams(fts_query=fts_query)
+        )
+        # bm25 scores are lower (more negative) for better matches
+        rank = func.bm25(literal_column("manga_fts"), *MANGA_FTS_WEIGHTS, type_=Float)
+        return query, -rank
+
+    ts_query = " & ".join(tokens[:-1] + [f"{tokens[-1]}:*"])
+    search_vector = literal_column("manga.search_vector")
+    ts_query = func.to_tsquery("english", ts_query)
+    # Stopwords are dropped from the tsquery; an empty one would match nothing
+    if db.scalar(select(func.numnode(ts_query))) == 0:
+        return query, None
+    query = query.filter(search_vector.op("@@")(ts_query))
+    return query, func.ts_rank_cd(search_vector, ts_query)
+
+
+def _filtered_query(db: Session, search_term: str, tags: list, year: int, min_rating: float, match: str, tag_mode: str, trace=NULL_TRACE):
+    """Manga query with the search filters applied.
+
+    Returns the query, the full-text relevance expression (or ``None``) and a
+    normalized description of the applied filters, used to cache totals.
+    """
     query = db.query(Manga)
+    relevance = None
+    filter_key = []
     
     # Apply filters
     if search_term and search_term.strip():
-        search_pattern = f"%{search_term.strip()}%"
-        query = query.filter(Manga.title.ilike(search_pattern))
-        print(f"Applied search filter: {search_pattern}")
+        filter_key.append(("search", match, " ".join(search_term.lower().split())))
+        if match != 'substring':
+            with trace.sql():
+                query, relevance = apply_fulltext_search(db, query, search_term)
+        if relevance is None:
+            # Substring mode, or a term full-text search can't express
+            query = query.filter(Manga.title.ilike(f"%{search_term.strip()}%"))
+        trace.set(match="fulltext" if relevance is not None else "substring")
     
-    if tags and len(tags) > 0:
-        # Clean and filter tags
-        valid_tags = [tag.strip() for tag in tags if tag and tag.strip()]
-        if valid_tags:
-            # Use PostgreSQL array operators for exact tag matching
-            for tag in valid_tags:
-                # Use ILIKE for case-insensitive matching within the array
-                query = query.filter(
-                    func.array_to_string(Manga.tags, ',').ilike(f'%{tag}%')
-                )
-            print(f"Applied tags filter: {valid_tags}")
+    if tags:
+        with trace.sql():
+            query = filter_by_tags(db, query, tags, tag_mode)
+        filter_key.append(("tags", tag_mode, tuple(sorted({clean_tag_name(t).lower() for t in tags}))))
     
     if year:
         query = query.filter(Manga.year == year)
-        print(f"Applied year filter: {year}")
+        filter_key.append(("year", year))
     
     if min_rating > 0:
         query = query.filter(Manga.rating >= min_rating)
-        print(f"Applied rating filter: >= {min_rating}")
+        filter_key.append(("min_rating", min_rating))
     
-    # Apply sorting
-    if sort_by == 'rating':
-        query = query.order_by(Manga.rating.desc())
+    return query, relevance, filter_key
+
+
+def search_manga(db: Session, search_term: str = None, tags: list = None, year: int = None, skip: int = 0, limit: int = 20, min_rating: float = 0, sort_by: str = 'popular', match: str = 'fulltext', tag_mode: str = 'all', cursor: str = None, count_strategy: str = None):
+    """Search the catalog.
+
+    Returns ``(manga_list, total, total_is_exact, next_cursor)``; whether the
+    total is exact depends on the count strategy (see app.services.search_count).
+    When the in-memory catalog index is enabled it answers searches without
+    a search term; text searches always go to the database.
+    """
+    valid_tags = [tag.strip() for tag in tags if tag and tag.strip()] if tags else []
+    trace = start_search_trace(
+        search=bool(search_term and search_term.strip()),
+        match=match,
+        tags=len(valid_tags),
+        tag_mode=tag_mode,
+        year=bool(year),
+        min_rating=min_rating > 0,
+        sort_by=sort_by,
+        cursor=bool(cursor),
+        skip=skip,
+        limit=limit,
+    )
+    
+    if not (search_term and search_term.strip()) and catalog_index_ready(db):
+        result = catalog_index.search(
+            tags=valid_tags, year=year, skip=skip, limit=limit,
+            min_rating=min_rating, sort_by=sort_by, tag_mode=tag_mode, cursor=cursor
+        )
+        trace.finish(source="index", rows=len(result[0]), total=result[1], total_exact=True)
+        return result
+    
+    query, relevance, filter_key = _filtered_query(
+        db, search_term, valid_tags, year, min_rating, match, tag_mode, trace
+    )
+    
+    # Apply sorting, always ending in a unique column so keyset cursors are stable
+    if sort_by == 'relevance' and relevance is not None:
+        sort_columns = [(relevance, True), (Manga.rating, True), (Manga.title, False), (Manga.id, False)]
+    elif sort_by == 'rating':
+        sort_columns = [(Manga.rating, True), (Manga.id, False)]
     elif sort_by == 'newest':
-        query = query.order_by(Manga.year.desc().nullslast())
+        sort_columns = [(Manga.year, True, True), (Manga.id, False)]
     elif sort_by == 'title':
-        query = query.order_by(Manga.title.asc())
-    else:  # default to 'popular'
-        query = query.order_by(Manga.rating.desc(), Manga.title.asc())
-    
-    print(f"Applied sorting: {sort_by}")
+        sort_columns = [(Manga.title, False), (Manga.id, False)]
+    else:  # default to 'popular' (also used for 'relevance' without a search term)
+        sort_by = 'popular'
+        sort_columns = [(Manga.popularity, True), (Manga.title, False), (Manga.id, False)]
     
     # Count total matching records
-    total = query.count()
-    print(f"Total matching records: {total}")
+    with trace.sql():
+        total, total_is_exact = count_search_results(
+            db, query, tuple(filter_key), filtered=bool(filter_key), strategy=count_strategy
+        )
     
     # Get paginated results
-    manga_list = query.offset(skip).limit(limit).all()
-    print(f"Returning {len(manga_list)} manga entries")
+    with trace.sql():
+        manga_list, next_cursor = paginate(query, sort_by, sort_columns, skip=skip, limit=limit, cursor=cursor)
     
-    return manga_list, total
+    trace.finish(source="database", rows=len(manga_list), total=total, total_exact=total_is_exact)
+    return manga_list, total, total_is_exact, next_cursor
+
+
+def search_facets(db: Session, search_term: str = None, tags: list = None, year: int = None, min_rating: float = 0, match: str = 'fulltext', tag_mode: str = 'all'):
+    """Tag, year and rating band counts for the manga matching a set of search filters"""
+    valid_tags = [tag.strip() for tag in tags if tag and tag.strip()] if tags else []
+    if not (search_term and search_term.strip()) and catalog_index_ready(db):
+        return catalog_index.facets(tags=valid_tags, year=year, min_rating=min_rating, tag_mode=tag_mode)
+    query, _, _ = _filtered_query(db, search_term, valid_tags, year, min_rating, match, tag_mode)
+    return database_facets(db, query)
 
 
 def create_manga(db: Session, manga: MangaCreate):
@@ -95,9 +300,11 @@ def create_manga(db: Session, manga: MangaCreate):
         tags=manga.tags,
         cover=manga.cover
     )
+    set_manga_tags(db, db_manga, manga.tags)
     db.add(db_manga)
     db.commit()
     db.refresh(db_manga)
+    catalog_changed(db_manga.id, manga=db_manga)
     return db_manga
 
 
@@ -107,8 +314,11 @@ def update_manga(db: Session, manga_id: int, manga: MangaUpdate):
         update_data = manga.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_manga, key, value)
+        if "tags" in update_data:
+            set_manga_tags(db, db_manga, update_data["tags"])
         db.commit()
         db.refresh(db_manga)
+        catalog_changed(db_manga.id, manga=db_manga)
     return db_manga
 
 
@@ -117,22 +327,90 @@ def delete_manga(db: Session, manga_id: int):
     if db_manga:
         db.delete(db_manga)
         db.commit()
+        catalog_changed(manga_id, deleted=True)
         return True
     return False
 
 
-def update_manga_rating(db: Session, manga_id: int):
-    """Update manga rating based on reviews"""
-    from app.models.review import Review
-    
-    # Calculate average rating from reviews
-    result = db.query(func.avg(Review.rating)).filter(Review.manga_id == manga_id).first()
-    avg_rating = result[0] if result[0] else 0.0
-    
-    # Update manga rating
+def notify_manga_changed(db: Session, manga_id: int):
+    """Tell catalog listeners about a committed write to a manga's rating or library counters.
+
+    Cheap enough to run inline after the commit, so this process's caches,
+    catalog index and title suggestions never wait on a deferred task.
+    """
     db_manga = get_manga(db, manga_id)
     if db_manga:
-        db_manga.rating = round(avg_rating, 1)
+        catalog_changed(manga_id, manga=db_manga)
+
+
+def notify_mangas_changed(db: Session, manga_ids):
+    """``notify_manga_changed`` for several manga, loaded with one query"""
+    manga_ids = list(manga_ids)
+    for db_manga in db.query(Manga).filter(Manga.id.in_(manga_ids)) if manga_ids else []:
+        catalog_changed(db_manga.id, manga=db_manga)
+
+
+def adjust_manga_rating(db: Session, manga_id: int, rating_delta: int, count_delta: int, activity_delta: int = None):
+    """Apply a review change to a manga's rating aggregates; the caller commits.
+
+    A single UPDATE computed from the stored totals, so it costs the same
+    however many reviews the manga has and concurrent review writes don't
+    overwrite each other. A review written or removed also counts as recent
+    activity unless ``activity_delta`` says otherwise. The popularity score
+    is recomputed afterwards by the ``rescore_manga`` task.
+    """
+    new_sum = Manga.rating_sum + rating_delta
+    new_count = Manga.rating_count + count_delta
+    db.query(Manga).filter(Manga.id == manga_id).update(
+        {
+            Manga.rating_sum: new_sum,
+            Manga.rating_count: new_count,
+            Manga.rating: case(
+                (new_count > 0, func.round(cast(cast(new_sum, Float) / new_count, Numeric), 1)),
+                else_=0.0,
+            ),
+        },
+        synchronize_session=False,
+    )
+    activity_delta = count_delta if activity_delta is None else activity_delta
+    if activity_delta:
+        popularity.adjust_recent_reviews(db, manga_id, activity_delta)
+
+
+def rating_mismatches(db: Session):
+    """Manga whose stored rating aggregates disagree with their reviews.
+
+    Returns ``(manga_id, stored_sum, stored_count, actual_sum, actual_count)`` rows.
+    """
+    from app.models.review import Review
+
+    actual = (
+        db.query(
+            Review.manga_id.label("manga_id"),
+            func.sum(Review.rating).label("rating_sum"),
+            func.count(Review.id).label("rating_count"),
+        )
+        .group_by(Review.manga_id)
+        .subquery()
+    )
+    actual_sum = func.coalesce(actual.c.rating_sum, 0)
+    actual_count = func.coalesce(actual.c.rating_count, 0)
+    return (
+        db.query(Manga.id, Manga.rating_sum, Manga.rating_count, actual_sum, actual_count)
+        .outerjoin(actual, actual.c.manga_id == Manga.id)
+        .filter(or_(Manga.rating_sum != actual_sum, Manga.rating_count != actual_count))
+        .order_by(Manga.id)
+        .all()
+    )
+
+
+def reconcile_manga_ratings(db: Session):
+    """Reset mismatched rating aggregates from the reviews table; returns the mismatches"""
+    mismatches = rating_mismatches(db)
+    for manga_id, stored_sum, stored_count, actual_sum, actual_count in mismatches:
+        adjust_manga_rating(db, manga_id, actual_sum - stored_sum, actual_count - stored_count, activity_delta=0)
+        popularity.refresh_popularity(db, manga_id)
+    if mismatches:
         db.commit()
-        return True
-    return False 
\ No newline at end of file
+        catalog_changed()
+    return mismatches
@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, tuple_, literal
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded or belongs to another sort"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(sort_key: str, values) -> str:
+    """Encode the sort values of the last row of a page into an opaque cursor"""
+    payload = json.dumps({"s": sort_key, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str, size: int):
+    """Decode a cursor produced by ``encode_cursor`` for the same sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload["v"]]
+        cursor_sort = payload["s"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursorError("Malformed cursor")
+    if cursor_sort != sort_key or len(values) != size:
+        raise InvalidCursorError("Cursor does not match the requested sort order")
+    return values
+
+
+def _sort_column(entry):
+    """Unpack a ``(expression, descending[, nulls_last])`` sort column"""
+    expr, descending = entry[0], entry[1]
+    nulls_last = entry[2] if len(entry) > 2 else False
+    return expr, descending, nulls_last
+
+
+def order_by_clauses(sort_columns):
+    """ORDER BY clauses for a list of ``(expression, descending[, nulls_last])`` entries"""
+    clauses = []
+    for entry in sort_columns:
+        expr, descending, nulls_last = _sort_column(entry)
+        clause = expr.desc() if descending else expr.asc()
+        clauses.append(clause.nullslast() if nulls_last else clause)
+    return clauses
+
+
+def _after(expr, descending, nulls_last, value):
+    """Condition for a single column value coming strictly after ``value``"""
+    if nulls_last:
+        if value is None:
+            # Nothing sorts after NULL on this column
+            return None
+        after = expr < value if descending else expr > value
+        return or_(after, expr.is_(None))
+    return expr < value if descending else expr > value
+
+
+def _equal(expr, nulls_last, value):
+    if nulls_last and value is None:
+        return expr.is_(None)
+    return expr == value
+
+
+def keyset_filter(sort_columns, values):
+    """Condition selecting the rows that come strictly after ``values``.
+
+    When every column sorts in the same direction and none is nullable this is
+    a single row-value comparison, which PostgreSQL answers straight from a
+    matching index. Otherwise it expands to ``a < x OR (a = x AND b > y) ...``,
+    prefixed with a plain range bound on the leading column so an index on the
+    sort columns can still seek to the cursor position instead of scanning
+    from the start.
+    """
+    columns = [_sort_column(entry) for entry in sort_columns]
+    directions = {descending for _, descending, _ in columns}
+    if len(directions) == 1 and not any(nulls_last for _, _, nulls_last in columns):
+        row = tuple_(*[expr for expr, _, _ in columns])
+        # Bind with the column types so values go through the same conversion as stored ones
+        last = tuple_(*[literal(value, expr.type) for (expr, _, _), value in zip(columns, values)])
+        return row < last if directions.pop() else row > last
+
+    clauses = []
+    for i, (expr, descending, nulls_last) in enumerate(columns):
+        after = _after(expr, descending, nulls_last, values[i])
+        if after is None:
+            continue
+        equal = [
+            _equal(column, column_nulls_last, value)
+            for (column, _, column_nulls_last), value in zip(columns[:i], values[:i])
+        ]
+        clauses.append(and_(*equal, after))
+    condition = or_(*clauses)
+
+    expr, descending, nulls_last = columns[0]
+    if values[0] is None:
+        return and_(expr.is_(None), condition)
+    bound = expr <= values[0] if descending else expr >= values[0]
+    if nulls_last:
+        bound = or_(bound, expr.is_(None))
+    return and_(bound, condition)
+
+
+def paginate(query, sort_key: str, sort_columns, skip: int = 0, limit: int = 20, cursor: str = None):
+    """Fetch one page of an ORM query ordered by ``sort_columns``.
+
+    Each sort column is ``(expression, descending)`` or
+    ``(expression, descending, nulls_last)``, and the last one must be unique.
+
+    With a cursor the page starts right after the row the cursor was taken
+    from (keyset pagination) and ``skip`` is ignored; otherwise it falls back
+    to offset pagination. Returns the page of entities and the cursor for the
+    next page, or ``None`` when there are no more rows.
+    """
+    query = query.order_by(*order_by_clauses(sort_columns))
+    if cursor:
+        values = decode_cursor(cursor, sort_key, len(sort_columns))
+        query = query.filter(keyset_filter(sort_columns, values))
+    else:
+        query = query.offset(skip)
+
+    sort_values = [entry[0].label(f"sort_key_{i}") for i, entry in enumerate(sort_columns)]
+    rows = query.add_columns(*sort_values).limit(limit).all()
+    items = [row[0] for row in rows]
+
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(sort_key, list(rows[-1][1:]))
+    return items, next_cursor
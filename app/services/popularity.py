@@ -0,0 +1,127 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, case, func, update
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.library import Library
+from app.models.manga import Manga
+from app.models.review import Review
+from app.services.catalog_state import catalog_changed
+
+load_dotenv()
+
+# Bayesian average: every manga starts with this many virtual reviews at the
+# prior rating, so a handful of reviews can't outrank a well reviewed title
+POPULARITY_PRIOR_WEIGHT = float(os.getenv("POPULARITY_PRIOR_WEIGHT", "10"))
+POPULARITY_PRIOR_RATING = float(os.getenv("POPULARITY_PRIOR_RATING", "3.0"))
+# Bonuses for library membership and recent reviews; each approaches its
+# weight as the count grows past its half point
+POPULARITY_LIBRARY_WEIGHT = float(os.getenv("POPULARITY_LIBRARY_WEIGHT", "1.0"))
+POPULARITY_LIBRARY_HALF = float(os.getenv("POPULARITY_LIBRARY_HALF", "50"))
+POPULARITY_ACTIVITY_WEIGHT = float(os.getenv("POPULARITY_ACTIVITY_WEIGHT", "0.5"))
+POPULARITY_ACTIVITY_HALF = float(os.getenv("POPULARITY_ACTIVITY_HALF", "5"))
+# Reviews newer than this count as recent activity
+POPULARITY_ACTIVITY_DAYS = int(os.getenv("POPULARITY_ACTIVITY_DAYS", "14"))
+
+# Manga updated per statement by the batch recompute
+POPULARITY_BATCH_SIZE = 1000
+
+
+def popularity_score(rating: float, rating_count: int, library_count: int, recent_reviews: int) -> float:
+    """Score the 'popular' sort orders manga by.
+
+    Reviewed manga use the Bayesian average of their reviews; unreviewed ones
+    keep the catalog rating they were imported with.
+    """
+    rating, rating_count = rating or 0.0, rating_count or 0
+    library_count, recent_reviews = max(library_count or 0, 0), max(recent_reviews or 0, 0)
+    if rating_count:
+        weighted = (POPULARITY_PRIOR_WEIGHT * POPULARITY_PRIOR_RATING + rating * rating_count) / (
+            POPULARITY_PRIOR_WEIGHT + rating_count
+        )
+    else:
+        weighted = rating
+    library = POPULARITY_LIBRARY_WEIGHT * library_count / (library_count + POPULARITY_LIBRARY_HALF)
+    activity = POPULARITY_ACTIVITY_WEIGHT * recent_reviews / (recent_reviews + POPULARITY_ACTIVITY_HALF)
+    return round(weighted + library + activity, 6)
+
+
+def refresh_popularity(db: Session, manga_id: int):
+    """Recompute one manga's score from its stored counters; the caller commits"""
+    refresh_popularities(db, [manga_id])
+
+
+def refresh_popularities(db: Session, manga_ids):
+    """Recompute the scores of several manga with one SELECT and one batched UPDATE"""
+    manga_ids = list(manga_ids)
+    rows = (
+        db.query(Manga.id, Manga.rating, Manga.rating_count, Manga.library_count, Manga.recent_reviews)
+        .filter(Manga.id.in_(manga_ids))
+        .all()
+    ) if manga_ids else []
+    if rows:
+        db.execute(update(Manga), [{"id": row[0], "popularity": popularity_score(*row[1:])} for row in rows])
+
+
+def adjust_library_count(db: Session, manga_id: int, delta: int):
+    """Count a library entry added to or removed from a manga; the caller commits and rescores"""
+    adjust_library_counts(db, {manga_id: delta})
+
+
+def adjust_library_counts(db: Session, deltas: dict):
+    """Apply ``{manga_id: delta}`` library count changes as one batched UPDATE"""
+    rows = [{"manga_id": manga_id, "delta": delta} for manga_id, delta in deltas.items() if delta]
+    if rows:
+        manga = Manga.__table__
+        db.execute(
+            update(manga).where(manga.c.id == bindparam("manga_id"))
+            .values(library_count=manga.c.library_count + bindparam("delta")),
+            rows,
+        )
+
+
+def adjust_recent_reviews(db: Session, manga_id: int, delta: int):
+    """Count a review written or removed; old reviews age out in the batch recompute"""
+    new_count = Manga.recent_reviews + delta
+    db.query(Manga).filter(Manga.id == manga_id).update(
+        {Manga.recent_reviews: case((new_count > 0, new_count), else_=0)}, synchronize_session=False
+    )
+
+
+def recompute_popularity(db: Session, batch_size: int = POPULARITY_BATCH_SIZE):
+    """Recount library entries and recent reviews for every manga and rescore them.
+
+    Meant to run periodically, so reviews drop out of the activity bonus once
+    they are older than POPULARITY_ACTIVITY_DAYS. Returns the number of manga
+    whose stored values changed.
+    """
+    since = datetime.utcnow() - timedelta(days=POPULARITY_ACTIVITY_DAYS)
+    library_counts = dict(
+        db.query(Library.manga_id, func.count()).group_by(Library.manga_id).all()
+    )
+    recent_counts = dict(
+        db.query(Review.manga_id, func.count(Review.id))
+        .filter(Review.timestamp >= since)
+        .group_by(Review.manga_id)
+        .all()
+    )
+
+    columns = (Manga.id, Manga.rating, Manga.rating_count, Manga.library_count, Manga.recent_reviews, Manga.popularity)
+    changes = []
+    for manga_id, rating, rating_count, library_count, recent_reviews, popularity in db.query(*columns).yield_per(batch_size):
+        values = {
+            "library_count": library_counts.get(manga_id, 0),
+            "recent_reviews": recent_counts.get(manga_id, 0),
+        }
+        values["popularity"] = popularity_score(rating, rating_count, values["library_count"], values["recent_reviews"])
+        if (library_count, recent_reviews, popularity) != (values["library_count"], values["recent_reviews"], values["popularity"]):
+            changes.append({"id": manga_id, **values})
+
+    for start in range(0, len(changes), batch_size):
+        db.execute(update(Manga), changes[start:start + batch_size])
+    db.commit()
+    if changes:
+        catalog_changed()
+    return len(changes)
@@ -0,0 +1,267 @@
+import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from dotenv import load_dotenv
+
+from app.db.database import pinned_to_primary
+from app.services.catalog_state import on_catalog_change
+
+load_dotenv()
+
+# Cache for anonymous catalog reads:
+#   none   - every request goes to the database
+#   memory - per-process LRU with TTL
+#   redis  - shared between workers through REDIS_URL
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "none")
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Namespaces entries are invalidated by
+CATALOG_NAMESPACE = "manga"
+
+
+def reviews_namespace(manga_id: int) -> str:
+    return f"reviews:{manga_id}"
+
+
+class CacheStats:
+    """Hit, miss, store and eviction counters for a response cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.stores = 0
+            self.evictions = 0
+            self.expirations = 0
+            self.invalidations = 0
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class NullCache:
+    """Backend that never stores anything"""
+
+    name = "none"
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value: bytes):
+        pass
+
+    def generation(self, namespace: str) -> int:
+        return 0
+
+    def bump(self, namespace: str):
+        pass
+
+    def clear(self):
+        pass
+
+    def info(self):
+        return {}
+
+
+class MemoryCache:
+    """In-process LRU of response bodies with a per-entry TTL"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: int = RESPONSE_CACHE_TTL, stats: CacheStats = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = stats
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._count("expirations")
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._count("evictions")
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace: str):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        return {"entries": len(self._entries), "max_size": self.max_size, "ttl": self.ttl}
+
+    def _count(self, name: str):
+        if self.stats is not None:
+            self.stats.incr(name)
+
+
+class RedisCache:
+    """Response bodies in Redis, shared by every worker.
+
+    Entries expire through Redis TTLs and Redis' own maxmemory policy; the
+    eviction counter reports the server's ``evicted_keys``.
+    """
+
+    name = "redis"
+
+    def __init__(self, client=None, url: str = REDIS_URL, ttl: int = RESPONSE_CACHE_TTL, prefix: str = "response:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value: bytes):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def generation(self, namespace: str) -> int:
+        value = self.client.get(f"{self.prefix}gen:{namespace}")
+        return int(value) if value is not None else 0
+
+    def bump(self, namespace: str):
+        self.client.incr(f"{self.prefix}gen:{namespace}")
+
+    def clear(self):
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            self.client.delete(key)
+
+    def info(self):
+        stats = self.client.info("stats")
+        return {"ttl": self.ttl, "server_evicted_keys": stats.get("evicted_keys", 0)}
+
+
+def create_backend(name: str = RESPONSE_CACHE_BACKEND, stats: CacheStats = None):
+    if name == "memory":
+        return MemoryCache(stats=stats)
+    if name == "redis":
+        return RedisCache()
+    return NullCache()
+
+
+def normalized_query(request: Request) -> str:
+    """Query string with parameters sorted and empty values dropped"""
+    params = sorted((key, value) for key, value in request.query_params.multi_items() if value != "")
+    return urlencode(params)
+
+
+def _etag(body: bytes) -> bytes:
+    return b'"' + hashlib.sha1(body).hexdigest()[:20].encode() + b'"'
+
+
+class ResponseCache:
+    """Caches serialized JSON responses keyed by path and normalized query.
+
+    Keys include the current generation of their namespace, so a write
+    invalidates every cached response in that namespace by bumping it.
+    """
+
+    def __init__(self, backend=None):
+        self.stats = CacheStats()
+        self.backend = backend if backend is not None else create_backend(stats=self.stats)
+
+    def configure(self, backend):
+        """Swap the backend, e.g. for tests, and reset the counters"""
+        if isinstance(backend, MemoryCache):
+            backend.stats = self.stats
+        self.backend = backend
+        self.stats.reset()
+
+    def key(self, namespace: str, request: Request) -> str:
+        generation = self.backend.generation(namespace)
+        return f"{namespace}:{generation}:{request.url.path}?{normalized_query(request)}"
+
+    def invalidate(self, namespace: str):
+        self.backend.bump(namespace)
+        self.stats.incr("invalidations")
+
+    def respond(self, request: Request, namespace: str, adapter: TypeAdapter, build, headers: dict = None):
+        """JSON response for ``request``, from the cache or from ``build()``.
+
+        ``build`` returns the data to validate against ``adapter``; exceptions
+        it raises (404s, bad cursors) are not cached. Responses carry an ETag
+        and answer a matching If-None-Match with 304.
+        """
+        key = self.key(namespace, request)
+        # A client that just wrote reads from the primary; an entry built from a
+        # lagging replica after its write's invalidation could hide that write
+        entry = None if pinned_to_primary(request) else self.backend.get(key)
+        if entry is not None:
+            self.stats.incr("hits")
+            etag, body = entry.split(b"\n", 1)
+            cache_status = "HIT"
+        else:
+            self.stats.incr("misses")
+            body = adapter.dump_json(adapter.validate_python(build(), from_attributes=True))
+            etag = _etag(body)
+            self.backend.set(key, etag + b"\n" + body)
+            self.stats.incr("stores")
+            cache_status = "MISS"
+
+        headers = {**(headers or {}), "ETag": etag.decode(), "X-Cache": cache_status}
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def report(self):
+        return {"backend": self.backend.name, **self.stats.as_dict(), **self.backend.info()}
+
+
+response_cache = ResponseCache()
+
+
+@on_catalog_change
+def _invalidate_catalog(manga_id, deleted, manga):
+    response_cache.invalidate(CATALOG_NAMESPACE)
+    if deleted and manga_id is not None:
+        response_cache.invalidate(reviews_namespace(manga_id))
@@ -0,0 +1,108 @@
+import os
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.services.catalog_state import get_catalog_version
+
+load_dotenv()
+
+# How search totals are computed:
+#   exact     - COUNT(*) over the filtered set on every request
+#   cached    - exact, but remembered per normalized filter set until the catalog changes
+#   estimated - PostgreSQL planner estimate for large result sets, exact below the threshold
+SEARCH_COUNT_STRATEGY = os.getenv("SEARCH_COUNT_STRATEGY", "exact")
+SEARCH_COUNT_CACHE_TTL = int(os.getenv("SEARCH_COUNT_CACHE_TTL", "300"))
+SEARCH_COUNT_CACHE_SIZE = int(os.getenv("SEARCH_COUNT_CACHE_SIZE", "1024"))
+SEARCH_COUNT_ESTIMATE_THRESHOLD = int(os.getenv("SEARCH_COUNT_ESTIMATE_THRESHOLD", "10000"))
+
+COUNT_STRATEGIES = ("exact", "cached", "estimated")
+
+
+class CountCache:
+    """Small LRU of search totals keyed by normalized filters and catalog version"""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            version, expires_at, total = entry
+            if version != get_catalog_version() or expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return total
+
+    def set(self, key, total: int):
+        with self._lock:
+            self._entries[key] = (get_catalog_version(), time.monotonic() + self.ttl, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache(SEARCH_COUNT_CACHE_SIZE, SEARCH_COUNT_CACHE_TTL)
+
+
+def _table_estimate(db: Session):
+    """Row estimate for the whole manga table from pg_class statistics"""
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'manga'::regclass")
+    ).scalar()
+    # reltuples is -1 (or 0 on older servers) until the table has been analyzed
+    return estimate if estimate and estimate > 0 else None
+
+
+def _plan_estimate(db: Session, query):
+    """Row estimate for a query from the PostgreSQL planner"""
+    compiled = query.statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True}
+    )
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+def count_search_results(db: Session, query, filter_key, filtered: bool, strategy: str = None):
+    """Count the rows of a search query using the configured strategy.
+
+    ``filter_key`` identifies the normalized filter set (sorting and paging
+    excluded) and ``filtered`` tells whether any filter is applied. Returns
+    ``(total, exact)``; ``exact`` is False when the total is a planner estimate.
+    """
+    strategy = strategy or SEARCH_COUNT_STRATEGY
+
+    if strategy == "estimated" and db.get_bind().dialect.name == "postgresql":
+        estimate = _plan_estimate(db, query) if filtered else _table_estimate(db)
+        if estimate and estimate >= SEARCH_COUNT_ESTIMATE_THRESHOLD:
+            return int(estimate), False
+        # Small result sets are cheap enough to count exactly
+        strategy = "cached"
+
+    if strategy == "cached":
+        total = count_cache.get(filter_key)
+        if total is None:
+            total = query.count()
+            count_cache.set(filter_key, total)
+        return total, True
+
+    return query.count(), True
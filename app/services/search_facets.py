@@ -0,0 +1,68 @@
+from sqlalchemy import case, func
+
+from app.models.manga import Manga
+from app.models.tag import Tag, manga_tags
+
+# Most tags returned in a facet list, by descending count
+FACET_TAG_LIMIT = 50
+
+# Lower bounds of the rating bands, highest first; each band runs up to the next
+RATING_BANDS = (4, 3, 2, 1, 0)
+
+
+def rating_band(rating: float) -> int:
+    """Lower bound of the band a rating falls in"""
+    rating = rating or 0.0
+    for band in RATING_BANDS:
+        if rating >= band:
+            return band
+    return RATING_BANDS[-1]
+
+
+def build_facets(tag_counts, year_counts: dict, band_counts: dict):
+    """Facet payload from raw counts; tags by count, years newest first, every rating band"""
+    tags = sorted(tag_counts, key=lambda item: (-item[1], item[0]))[:FACET_TAG_LIMIT]
+    return {
+        "tags": [{"name": name, "count": count} for name, count in tags],
+        "years": [{"year": year, "count": year_counts[year]} for year in sorted(year_counts, reverse=True)],
+        "ratings": [
+            {"min": band, "max": band + 1 if band < RATING_BANDS[0] else 5, "count": band_counts.get(band, 0)}
+            for band in RATING_BANDS
+        ],
+    }
+
+
+def database_facets(db, query):
+    """Tag, year and rating band counts over the rows of a filtered manga query.
+
+    Two grouped aggregates over the same filtered set: one joined to the tag
+    link table, one grouping by year and rating band together.
+    """
+    band = case(
+        *[(Manga.rating >= value, value) for value in RATING_BANDS[:-1]],
+        else_=RATING_BANDS[-1],
+    )
+    year_band_rows = (
+        query.with_entities(Manga.year, band, func.count(Manga.id))
+        .order_by(None)
+        .group_by(Manga.year, band)
+        .all()
+    )
+    year_counts, band_counts = {}, {}
+    for year, band_value, count in year_band_rows:
+        if year is not None:
+            year_counts[year] = year_counts.get(year, 0) + count
+        band_counts[band_value] = band_counts.get(band_value, 0) + count
+
+    count = func.count(Manga.id)
+    tag_rows = (
+        query.with_entities(Tag.name, count)
+        .join(manga_tags, manga_tags.c.manga_id == Manga.id)
+        .join(Tag, Tag.id == manga_tags.c.tag_id)
+        .order_by(None)
+        .group_by(Tag.id, Tag.name)
+        .order_by(count.desc(), Tag.name)
+        .limit(FACET_TAG_LIMIT)
+        .all()
+    )
+    return build_facets(tag_rows, year_counts, band_counts)
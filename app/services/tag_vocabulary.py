@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.tag import Tag, manga_tags
+from app.services.catalog_state import get_catalog_version
+
+load_dotenv()
+
+# Upper bound on how long a vocabulary is reused. Writes in this process
+# invalidate it straight away; the TTL bounds staleness from other workers.
+TAG_VOCABULARY_TTL = int(os.getenv("TAG_VOCABULARY_TTL", "60"))
+
+
+class TagVocabulary:
+    """Tags in use with their manga counts"""
+
+    def __init__(self, counts: list, version: int):
+        self.counts = counts
+        self.names = [entry["name"] for entry in counts]
+        self.version = version
+        self.expires_at = time.monotonic() + TAG_VOCABULARY_TTL
+
+    def is_current(self):
+        return self.version == get_catalog_version() and self.expires_at > time.monotonic()
+
+
+_vocabulary = None
+_vocabulary_lock = threading.Lock()
+
+
+def build_tag_vocabulary(db: Session):
+    """Count manga per tag with one grouped query over manga_tags"""
+    version = get_catalog_version()
+    rows = (
+        db.query(Tag.name, func.count(manga_tags.c.manga_id))
+        .join(manga_tags, manga_tags.c.tag_id == Tag.id)
+        .group_by(Tag.id, Tag.name)
+        .order_by(Tag.name)
+        .all()
+    )
+    return TagVocabulary([{"name": name, "count": count} for name, count in rows], version)
+
+
+def get_tag_vocabulary(db: Session):
+    """The current tag vocabulary, rebuilt only after the catalog changes"""
+    global _vocabulary
+    vocabulary = _vocabulary
+    if vocabulary is not None and vocabulary.is_current():
+        return vocabulary
+    with _vocabulary_lock:
+        if _vocabulary is None or not _vocabulary.is_current():
+            _vocabulary = build_tag_vocabulary(db)
+        return _vocabulary
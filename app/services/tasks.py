@@ -0,0 +1,221 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from app.db.database import get_session_factory
+from app.services import manga_service, popularity
+from app.services.like_counter import LIKE_FLUSH_INTERVAL, like_counter
+from app.services.response_cache import REDIS_URL
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Where deferred work runs:
+#   eager  - inline, before the caller continues (tests, scripts)
+#   thread - an in-process thread pool, after the response is on its way
+#   celery - Celery workers (`celery -A app.worker worker --beat`)
+TASK_BACKEND = os.getenv("TASK_BACKEND", "thread")
+TASK_THREAD_WORKERS = int(os.getenv("TASK_THREAD_WORKERS", "4"))
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+
+
+class Task:
+    """A function that can run now or be deferred with ``delay``.
+
+    Arguments must be JSON serializable so they can cross to a Celery worker,
+    and tasks open their own session with ``open_session()``.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = f"mangalist.{func.__name__}"
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Queue the task on the configured backend"""
+        task_runner.backend.submit(self, args, kwargs)
+
+
+# Every task, by name, so Celery workers can register them
+registry = {}
+
+
+def task(func):
+    registered = Task(func)
+    registry[registered.name] = registered
+    return registered
+
+
+def _run_logged(task: Task, args, kwargs):
+    try:
+        task(*args, **kwargs)
+    except Exception:
+        logger.exception("Task %s failed", task.name)
+
+
+class EagerBackend:
+    """Runs tasks inline; errors propagate to the caller"""
+
+    name = "eager"
+
+    def submit(self, task: Task, args, kwargs):
+        task(*args, **kwargs)
+
+    def shutdown(self):
+        pass
+
+
+class ThreadBackend:
+    """Runs tasks on a thread pool in this process; failures are logged"""
+
+    name = "thread"
+
+    def __init__(self, workers: int = TASK_THREAD_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, task: Task, args, kwargs):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="task")
+            executor = self._executor
+        executor.submit(_run_logged, task, args, kwargs)
+
+    def shutdown(self):
+        """Wait for queued tasks to finish"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class CeleryBackend:
+    """Sends tasks to Celery workers through CELERY_BROKER_URL"""
+
+    name = "celery"
+
+    def __init__(self, broker_url: str = CELERY_BROKER_URL):
+        self.broker_url = broker_url
+        self._app = None
+
+    @property
+    def app(self):
+        if self._app is None:
+            self._app = create_celery_app(self.broker_url)
+        return self._app
+
+    def submit(self, task: Task, args, kwargs):
+        self.app.send_task(task.name, args=list(args), kwargs=kwargs)
+
+    def shutdown(self):
+        pass
+
+
+def create_celery_app(broker_url: str = CELERY_BROKER_URL):
+    """Celery app with every registered task and the periodic batches"""
+    from celery import Celery
+
+    app = Celery("mangalist", broker=broker_url)
+    app.conf.task_ignore_result = True
+    for name, registered in registry.items():
+        app.task(name=name)(registered.func)
+    app.conf.beat_schedule = {
+        "flush-like-counters": {"task": flush_like_counters.name, "schedule": LIKE_FLUSH_INTERVAL},
+        "recompute-popularity": {"task": recompute_popularity.name, "schedule": 3600.0},
+    }
+    return app
+
+
+def create_backend(name: str = TASK_BACKEND):
+    if name == "eager":
+        return EagerBackend()
+    if name == "celery":
+        return CeleryBackend()
+    return ThreadBackend()
+
+
+def _default_session():
+    return get_session_factory()()
+
+
+class TaskRunner:
+    """The configured backend and the session factory tasks use"""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else create_backend()
+        self.session_factory = _default_session
+
+    def configure(self, backend=None, session_factory=None):
+        """Swap the backend or the session factory, e.g. for tests"""
+        if backend is not None:
+            self.backend = backend
+        if session_factory is not None:
+            self.session_factory = session_factory
+
+    def shutdown(self):
+        self.backend.shutdown()
+
+
+task_runner = TaskRunner()
+
+
+def open_session():
+    return task_runner.session_factory()
+
+
+# Deferred work
+
+@task
+def rescore_manga(manga_id: int):
+    """Recompute a manga's popularity after a review or library write.
+
+    The writer has already notified catalog listeners in its own process;
+    this notifies them again once the new score is stored.
+    """
+    db = open_session()
+    try:
+        popularity.refresh_popularity(db, manga_id)
+        db.commit()
+        manga_service.notify_manga_changed(db, manga_id)
+    finally:
+        db.close()
+
+
+@task
+def rescore_manga_batch(manga_ids: list):
+    """Recompute the popularity of every manga touched by a bulk library write"""
+    db = open_session()
+    try:
+        popularity.refresh_popularities(db, manga_ids)
+        db.commit()
+        manga_service.notify_mangas_changed(db, manga_ids)
+    finally:
+        db.close()
+
+
+@task
+def flush_like_counters():
+    """Apply buffered like counter deltas"""
+    db = open_session()
+    try:
+        return like_counter.flush(db)
+    finally:
+        db.close()
+
+
+@task
+def recompute_popularity():
+    """Recount library entries and recent reviews for every manga"""
+    db = open_session()
+    try:
+        return popularity.recompute_popularity(db)
+    finally:
+        db.close()
@@ -0,0 +1,210 @@
+import re
+import threading
+from bisect import bisect_left, insort
+
+from sqlalchemy.orm import Session
+
+from app.models.manga import Manga
+from app.services.catalog_state import on_catalog_change
+
+# Most suggestions a single request can ask for
+SUGGEST_MAX_LIMIT = 20
+# Prefixes shorter than this match a large share of the catalog, so their
+# top suggestions are kept precomputed instead of scanning the range
+SUGGEST_SHORT_PREFIX = 3
+
+
+def normalize_title(value: str) -> str:
+    """Lowercase a title or query and collapse punctuation and spacing"""
+    return " ".join(re.findall(r"\w+", (value or "").lower()))
+
+
+def _title_keys(title: str):
+    """Index keys for a title: the whole title and the rest of it from each later word"""
+    tokens = normalize_title(title).split()
+    return [(" ".join(tokens[i:]), i == 0) for i in range(len(tokens))]
+
+
+class TitleSuggestIndex:
+    """Sorted array of title keys for prefix and word-prefix lookups.
+
+    Every title is stored once per word, starting at that word, so "pie"
+    finds "One Piece" through its "piece" key. Matches on the start of a title
+    rank first, then higher rated manga.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.keys = []      # sorted (key, manga id, starts title)
+            self.entries = {}   # manga id -> (title, cover, rating, keys)
+            self.top = {}       # short prefix -> best suggestions as (rank, id)
+            self.ready = False
+
+    def load(self, db: Session):
+        """Build the index from the manga titles"""
+        keys, entries = [], {}
+        for manga_id, title, cover, rating in db.query(Manga.id, Manga.title, Manga.cover, Manga.rating).yield_per(1000):
+            title_keys = _title_keys(title)
+            entries[manga_id] = (title, cover, rating or 0.0, title_keys)
+            keys.extend((key, manga_id, starts) for key, starts in title_keys)
+        keys.sort()
+
+        with self._lock:
+            self.keys = keys
+            self.entries = entries
+            self.top = {}
+            for key, manga_id, starts in keys:
+                for prefix in self._short_prefixes(key):
+                    self._offer(prefix, manga_id, starts)
+            self.ready = True
+
+    @staticmethod
+    def _short_prefixes(key: str):
+        return {key[:n] for n in range(1, SUGGEST_SHORT_PREFIX) if len(key) >= n}
+
+    def _rank(self, manga_id: int, starts: bool):
+        title, _, rating, _ = self.entries[manga_id]
+        return (not starts, -rating, title)
+
+    def _offer(self, prefix: str, manga_id: int, starts: bool):
+        """Add a match to a short prefix's top list if it ranks high enough"""
+        top = self.top.setdefault(prefix, [])
+        rank = (self._rank(manga_id, starts), manga_id)
+        if any(existing_id == manga_id for _, existing_id in top):
+            # A title can match one prefix through several words; keep its best
+            best = min(rank, next(r for r in top if r[1] == manga_id))
+            top[:] = [r for r in top if r[1] != manga_id]
+            rank = best
+        if len(top) < SUGGEST_MAX_LIMIT or rank < top[-1]:
+            insort(top, rank)
+            del top[SUGGEST_MAX_LIMIT:]
+
+    def _rebuild_top(self, prefixes):
+        """Recompute the top lists of short prefixes from the key range"""
+        for prefix in prefixes:
+            self.top.pop(prefix, None)
+            start = bisect_left(self.keys, (prefix,))
+            for key, manga_id, starts in self.keys[start:]:
+                if not key.startswith(prefix):
+                    break
+                self._offer(prefix, manga_id, starts)
+
+    def _prefix_ranks(self, manga_id: int):
+        """The rank a manga holds in each short prefix's top list, by its best matching key"""
+        ranks = {}
+        for key, starts in self.entries[manga_id][3]:
+            rank = (self._rank(manga_id, starts), manga_id)
+            for prefix in self._short_prefixes(key):
+                if prefix not in ranks or rank < ranks[prefix]:
+                    ranks[prefix] = rank
+        return ranks
+
+    def _update_top(self, old_ranks: dict, new_ranks: dict):
+        """Move one manga within the top lists it was or now is in.
+
+        Only a full list the manga left, or fell to the bottom of, has to be
+        rescanned, since a title outside it may now belong in it.
+        """
+        rescan = []
+        for prefix in old_ranks.keys() | new_ranks.keys():
+            top = self.top.setdefault(prefix, [])
+            old_rank, new_rank = old_ranks.get(prefix), new_ranks.get(prefix)
+            was_full = len(top) >= SUGGEST_MAX_LIMIT
+            if old_rank is not None and old_rank in top:
+                top.remove(old_rank)
+                if was_full and (new_rank is None or new_rank > top[-1]):
+                    rescan.append(prefix)
+                    continue
+            if new_rank is not None and (len(top) < SUGGEST_MAX_LIMIT or new_rank < top[-1]):
+                insort(top, new_rank)
+                del top[SUGGEST_MAX_LIMIT:]
+            if not top:
+                del self.top[prefix]
+        self._rebuild_top(rescan)
+
+    def _discard(self, manga_id: int):
+        """Take a manga out of the key array; returns its top list ranks"""
+        if manga_id not in self.entries:
+            return {}
+        ranks = self._prefix_ranks(manga_id)
+        for key, starts in self.entries.pop(manga_id)[3]:
+            index = bisect_left(self.keys, (key, manga_id, starts))
+            if index < len(self.keys) and self.keys[index] == (key, manga_id, starts):
+                del self.keys[index]
+        return ranks
+
+    def upsert(self, manga):
+        """Add or refresh one manga after it was written"""
+        with self._lock:
+            if not self.ready:
+                return
+            rating = manga.rating or 0.0
+            entry = self.entries.get(manga.id)
+            if entry and (entry[0], entry[2]) == (manga.title, rating):
+                # Most writes (reviews, library changes) leave title and rating alone
+                self.entries[manga.id] = (manga.title, manga.cover, rating, entry[3])
+                return
+            old_ranks = self._discard(manga.id)
+            title_keys = _title_keys(manga.title)
+            self.entries[manga.id] = (manga.title, manga.cover, rating, title_keys)
+            for key, starts in title_keys:
+                insort(self.keys, (key, manga.id, starts))
+            self._update_top(old_ranks, self._prefix_ranks(manga.id))
+
+    def remove(self, manga_id: int):
+        with self._lock:
+            if self.ready:
+                self._update_top(self._discard(manga_id), {})
+
+    def suggest(self, query: str, limit: int = 10):
+        """Best matching ``(id, title, cover)`` for a title or word prefix"""
+        prefix = normalize_title(query)
+        if not prefix:
+            return []
+        limit = min(limit, SUGGEST_MAX_LIMIT)
+        with self._lock:
+            if len(prefix) < SUGGEST_SHORT_PREFIX:
+                ranked = self.top.get(prefix, [])
+            else:
+                best = {}
+                start = bisect_left(self.keys, (prefix,))
+                for key, manga_id, starts in self.keys[start:]:
+                    if not key.startswith(prefix):
+                        break
+                    rank = self._rank(manga_id, starts)
+                    if manga_id not in best or rank < best[manga_id]:
+                        best[manga_id] = rank
+                ranked = sorted((rank, manga_id) for manga_id, rank in best.items())
+            results = []
+            for _, manga_id in ranked[:limit]:
+                title, cover, _, _ = self.entries[manga_id]
+                results.append({"id": manga_id, "title": title, "cover": cover})
+            return results
+
+
+title_suggest_index = TitleSuggestIndex()
+_load_lock = threading.Lock()
+
+
+def suggest_titles(db: Session, query: str, limit: int = 10):
+    """Title suggestions, loading the index on first use"""
+    if not title_suggest_index.ready:
+        with _load_lock:
+            if not title_suggest_index.ready:
+                title_suggest_index.load(db)
+    return title_suggest_index.suggest(query, limit)
+
+
+@on_catalog_change
+def _sync_title_suggest(manga_id, deleted, manga):
+    if deleted:
+        title_suggest_index.remove(manga_id)
+    elif manga is not None:
+        title_suggest_index.upsert(manga)
+    else:
+        # Bulk change without the row at hand: reload on the next request
+        title_suggest_index.clear()
@@ -0,0 +1,8 @@
+"""Celery entry point for TASK_BACKEND=celery.
+
+    celery -A app.worker worker --beat --loglevel=info
+"""
+from app.models import user, manga, library, review, tag  # noqa: F401 - register models
+from app.services.tasks import create_celery_app
+
+celery_app = create_celery_app()
@@ -0,0 +1,84 @@
+"""Per-call cost of the hot single-row lookups: legacy ``db.query()`` vs the repository.
+
+Both variants fetch the same rows from an in-memory SQLite database, so the
+difference is the Python-side ORM overhead (statement construction, cache key
+generation, compilation) rather than database time.
+
+    python benchmarks/orm_lookups.py --iterations 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import repository
+from app.db.database import Base
+from app.models import tag  # noqa: F401 - register models
+from app.models.library import Library
+from app.models.manga import Manga
+from app.models.review import Review
+from app.models.user import User
+
+ROWS = 1000
+
+
+def seed(db: Session):
+    db.add_all(User(id=i, username=f"user{i}", email=f"user{i}@example.com", password_hash="-") for i in range(1, ROWS + 1))
+    db.add_all(Manga(id=i, title=f"Manga {i}") for i in range(1, ROWS + 1))
+    db.flush()
+    db.add_all(Library(user_id=i, manga_id=i, status="reading", progress=0) for i in range(1, ROWS + 1))
+    db.add_all(Review(id=i, user_id=i, manga_id=i, content="-", rating=3, likes=0) for i in range(1, ROWS + 1))
+    db.commit()
+
+
+LEGACY = {
+    "manga by id": lambda db, i: db.query(Manga).filter(Manga.id == i).first(),
+    "user by id": lambda db, i: db.query(User).filter(User.id == i).first(),
+    "library entry": lambda db, i: db.query(Library).filter(Library.user_id == i, Library.manga_id == i).first(),
+    "review by id": lambda db, i: db.query(Review).filter(Review.id == i).first(),
+}
+
+REPOSITORY = {
+    "manga by id": repository.get_manga,
+    "user by id": repository.get_user,
+    "library entry": lambda db, i: repository.get_library_entry(db, i, i),
+    "review by id": repository.get_review,
+}
+
+
+def time_lookups(db: Session, lookup, ids):
+    started = time.perf_counter()
+    for i in ids:
+        lookup(db, i)
+        # Like a fresh request: nothing served from the identity map
+        db.expunge_all()
+    return (time.perf_counter() - started) / len(ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        seed(db)
+        ids = [random.randint(1, ROWS) for _ in range(args.iterations)]
+        for name in LEGACY:
+            # Warm up both statement caches first
+            time_lookups(db, LEGACY[name], ids[:100])
+            time_lookups(db, REPOSITORY[name], ids[:100])
+            legacy = time_lookups(db, LEGACY[name], ids)
+            cached = time_lookups(db, REPOSITORY[name], ids)
+            print(f"{name:>14}: query() {legacy:6.1f} us  repository {cached:6.1f} us  ({1 - cached / legacy:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,6 +37,8 @@ export default function MangaBrowse() {
   const [loading, setLoading] = useState(true);
   const [page, setPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
+  const [totalResults, setTotalResults] = useState(0);
+  const [totalIsExact, setTotalIsExact] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [minRating, setMinRating] = useState(0);
   const [sortBy, setSortBy] = useState('popular');
@@ -97,6 +99,8 @@ export default function MangaBrowse() {
         console.log('Received manga data:', result);
         setManga(result.results || []);
         setTotalPages(Math.ceil(result.total / ITEMS_PER_PAGE) || 1);
+        setTotalResults(result.total || 0);
+        setTotalIsExact(result.total_is_exact !== false);
       } catch (error) {
         console.error('Error fetching manga:', error);
       } finally {
@@ -222,6 +226,7 @@ export default function MangaBrowse() {
                 <option value="rating">Rating</option>
                 <option value="newest">Newest</option>
                 <option value="title">Title (A-Z)</option>
+                <option value="relevance">Relevance</option>
               </Select>
             </Box>
             
@@ -280,7 +285,7 @@ export default function MangaBrowse() {
           ) : (
             <>
               <Text mb={4}>
-                Showing {manga.length} of {totalPages * ITEMS_PER_PAGE} results
+                Showing {manga.length} of {totalIsExact ? '' : '~'}{totalResults.toLocaleString()} results
               </Text>
               
               <SimpleGrid columns={{ base: 1, sm: 2, md: 3, lg: 4 }} spacing={6}>
@@ -0,0 +1,69 @@
+"""Normalized manga tags
+
+Revision ID: 3b9f6c2a7d14
+Revises: e1d1057b109e
+Create Date: 2026-10-17 10:03:17.552904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9f6c2a7d14'
+down_revision = 'e1d1057b109e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('normalized', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tags_id'), 'tags', ['id'], unique=False)
+    op.create_index(op.f('ix_tags_normalized'), 'tags', ['normalized'], unique=True)
+    op.create_table('manga_tags',
+    sa.Column('manga_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['manga_id'], ['manga.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('manga_id', 'tag_id')
+    )
+    op.create_index('ix_manga_tags_tag_id_manga_id', 'manga_tags', ['tag_id', 'manga_id'], unique=False)
+
+    # Backfill from the tag arrays, cleaned the same way as manga_service.clean_tag_name
+    op.execute(
+        """
+        CREATE TEMP TABLE manga_tag_names ON COMMIT DROP AS
+        SELECT DISTINCT m.id AS manga_id,
+               regexp_replace(trim(regexp_replace(t.tag, '[][''"]', '', 'g')), '\\s+', ' ', 'g') AS name
+        FROM manga m CROSS JOIN LATERAL unnest(m.tags) AS t(tag)
+        """
+    )
+    op.execute("DELETE FROM manga_tag_names WHERE name = ''")
+    op.execute(
+        """
+        INSERT INTO tags (name, normalized)
+        SELECT DISTINCT ON (lower(name)) name, lower(name)
+        FROM manga_tag_names
+        ORDER BY lower(name), name
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO manga_tags (manga_id, tag_id)
+        SELECT DISTINCT n.manga_id, t.id
+        FROM manga_tag_names n JOIN tags t ON t.normalized = lower(n.name)
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_manga_tags_tag_id_manga_id', table_name='manga_tags')
+    op.drop_table('manga_tags')
+    op.drop_index(op.f('ix_tags_normalized'), table_name='tags')
+    op.drop_index(op.f('ix_tags_id'), table_name='tags')
+    op.drop_table('tags')
@@ -0,0 +1,61 @@
+"""Review, like and library indexes
+
+Revision ID: 5d2e8a41c9b3
+Revises: 7c41d8e2f0a9
+Create Date: 2026-10-17 15:42:18.530912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8a41c9b3'
+down_revision = '7c41d8e2f0a9'
+branch_labels = None
+depends_on = None
+
+# Users who reviewed the same manga more than once, which the unique index forbids
+DUPLICATE_REVIEWS = """
+    SELECT user_id, manga_id, COUNT(*) AS reviews, MIN(id) AS first_id
+    FROM reviews
+    GROUP BY user_id, manga_id
+    HAVING COUNT(*) > 1
+    ORDER BY user_id, manga_id
+"""
+
+
+def upgrade():
+    # The read-then-insert check in create_review could race. Duplicates are
+    # user data, so stop and list them rather than pick one to delete
+    duplicates = op.get_bind().execute(sa.text(DUPLICATE_REVIEWS)).all()
+    if duplicates:
+        listed = "\n".join(
+            f"  user {user_id}, manga {manga_id}: {count} reviews (first id {first_id})"
+            for user_id, manga_id, count, first_id in duplicates
+        )
+        raise RuntimeError(
+            f"{len(duplicates)} users reviewed the same manga more than once, so "
+            f"uq_reviews_user_id_manga_id can't be created. Merge or remove the extra "
+            f"reviews (and their likes) and rerun the upgrade:\n{listed}"
+        )
+
+    op.create_index('uq_reviews_user_id_manga_id', 'reviews', ['user_id', 'manga_id'], unique=True)
+    op.create_index(
+        'ix_reviews_manga_likes_timestamp_id', 'reviews',
+        ['manga_id', sa.text('likes DESC'), sa.text('timestamp DESC'), sa.text('id DESC')], unique=False
+    )
+    op.create_index(
+        'ix_reviews_manga_timestamp_id', 'reviews',
+        ['manga_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False
+    )
+    op.create_index('ix_likes_review_id', 'likes', ['review_id'], unique=False)
+    op.create_index('ix_library_user_id_status', 'library', ['user_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_library_user_id_status', table_name='library')
+    op.drop_index('ix_likes_review_id', table_name='likes')
+    op.drop_index('ix_reviews_manga_timestamp_id', table_name='reviews')
+    op.drop_index('ix_reviews_manga_likes_timestamp_id', table_name='reviews')
+    op.drop_index('uq_reviews_user_id_manga_id', table_name='reviews')
@@ -0,0 +1,24 @@
+"""Manga popular sort index
+
+Revision ID: 7c41d8e2f0a9
+Revises: 3b9f6c2a7d14
+Create Date: 2026-10-17 11:20:05.104377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c41d8e2f0a9'
+down_revision = '3b9f6c2a7d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_manga_rating_title_id', 'manga', [sa.text('rating DESC'), 'title', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_manga_rating_title_id', table_name='manga')
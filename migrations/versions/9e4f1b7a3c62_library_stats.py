@@ -0,0 +1,48 @@
+"""Per-user library stats
+
+Revision ID: 9e4f1b7a3c62
+Revises: c2b7e9d40f58
+Create Date: 2026-10-17 19:12:41.218304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4f1b7a3c62'
+down_revision = 'c2b7e9d40f58'
+branch_labels = None
+depends_on = None
+
+STATUS_COUNTERS = {
+    'reading': 'READING',
+    'completed': 'COMPLETED',
+    'on_hold': 'ON_HOLD',
+    'dropped': 'DROPPED',
+    'plan_to_read': 'PLAN_TO_READ',
+}
+
+
+def upgrade():
+    op.create_table(
+        'library_stats',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('entries', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('chapters_read', sa.Integer(), nullable=False, server_default='0'),
+        *[sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in STATUS_COUNTERS],
+    )
+    # Backfill from the existing entries; the enum is stored by name
+    counters = ", ".join(STATUS_COUNTERS)
+    counts = ", ".join(
+        f"SUM(CASE WHEN status = '{value}' THEN 1 ELSE 0 END)" for value in STATUS_COUNTERS.values()
+    )
+    op.execute(f"""
+        INSERT INTO library_stats (user_id, entries, chapters_read, {counters})
+        SELECT user_id, COUNT(*), COALESCE(SUM(progress), 0), {counts}
+        FROM library GROUP BY user_id
+    """)
+
+
+def downgrade():
+    op.drop_table('library_stats')
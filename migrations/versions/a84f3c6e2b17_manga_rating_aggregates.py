@@ -0,0 +1,32 @@
+"""Manga rating aggregates
+
+Revision ID: a84f3c6e2b17
+Revises: 5d2e8a41c9b3
+Create Date: 2026-10-17 16:30:52.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a84f3c6e2b17'
+down_revision = '5d2e8a41c9b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('manga', sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('manga', sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute("""
+        UPDATE manga SET
+            rating_sum = (SELECT COALESCE(SUM(reviews.rating), 0) FROM reviews WHERE reviews.manga_id = manga.id),
+            rating_count = (SELECT COUNT(*) FROM reviews WHERE reviews.manga_id = manga.id)
+        WHERE id IN (SELECT manga_id FROM reviews)
+    """)
+
+
+def downgrade():
+    op.drop_column('manga', 'rating_count')
+    op.drop_column('manga', 'rating_sum')
@@ -0,0 +1,37 @@
+"""Manga popularity score
+
+Revision ID: c2b7e9d40f58
+Revises: a84f3c6e2b17
+Create Date: 2026-10-17 17:55:09.402671
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2b7e9d40f58'
+down_revision = 'a84f3c6e2b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('manga', sa.Column('library_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('manga', sa.Column('recent_reviews', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('manga', sa.Column('popularity', sa.Float(), nullable=False, server_default='0'))
+    # Start from the current 'popular' order; run `python -m app.data.refresh_popularity`
+    # afterwards to score the rows with their reviews and library counts
+    op.execute("""
+        UPDATE manga SET
+            library_count = (SELECT COUNT(*) FROM library WHERE library.manga_id = manga.id),
+            popularity = COALESCE(rating, 0)
+    """)
+    op.create_index('ix_manga_popularity_title_id', 'manga', [sa.text('popularity DESC'), 'title', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_manga_popularity_title_id', table_name='manga')
+    op.drop_column('manga', 'popularity')
+    op.drop_column('manga', 'recent_reviews')
+    op.drop_column('manga', 'library_count')
@@ -0,0 +1,33 @@
+"""Manga full-text search vector
+
+Revision ID: e1d1057b109e
+Revises: fc2d26c79e77
+Create Date: 2026-10-17 09:12:44.318207
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1d1057b109e'
+down_revision = 'fc2d26c79e77'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        ALTER TABLE manga ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_manga_search_vector ON manga USING GIN (search_vector)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_manga_search_vector")
+    op.execute("ALTER TABLE manga DROP COLUMN IF EXISTS search_vector")